@@ -1,19 +1,26 @@
 import os
+import re
 import datetime
 import pytz
-from flask import Flask, Response
+from flask import Flask, Response, request, send_from_directory, abort
 from flask_apscheduler import APScheduler
-from apscheduler.triggers.cron import CronTrigger
-from apscheduler.triggers.interval import IntervalTrigger
-import atlantic_rss_reader
-import gemini_summarizer
 import rss_generator
-import github_sync
-import httpx
+import job_runner
+import jobs
+from jobs import process_articles  # noqa: F401  保持 app.process_articles 可用
+from feed_cache import FeedCache, choose_encoding
+
+# 运行模式：all 为Web进程同时运行定时任务（通过主节点锁保证只有一个进程运行），
+# web 为只提供HTTP服务，定时任务由单独的 worker.py 进程运行
+RUN_MODE = os.environ.get("RUN_MODE", "all").lower()
 
 # 创建Flask应用
 app = Flask(__name__)
 
+# feed内存缓存，本进程保存新feed时立即失效，其他进程（worker）更新文件时通过文件状态检测
+feed_cache = FeedCache(rss_generator.FEED_FILE)
+rss_generator.add_feed_listener(feed_cache.invalidate)
+
 # 创建调度器
 scheduler = APScheduler()
 scheduler.init_app(app)
@@ -23,105 +30,57 @@ def get_beijing_time():
     beijing = pytz.timezone('Asia/Shanghai')
     return datetime.datetime.now(beijing)
 
-# 主要任务流程
-def process_articles():
-    try:
-        # 1. 抓取文章
-        rss_content = atlantic_rss_reader.fetch_rss_feed()
-        if not rss_content:
-            print("获取RSS内容失败")
-            return
-        
-        entries = atlantic_rss_reader.parse_rss(rss_content)
-        if not entries:
-            print("解析RSS内容失败")
-            return
-        
-        # 确保目录存在
-        atlantic_rss_reader.setup_directory()
-        
-        # 获取今天的文件名
-        today_file = atlantic_rss_reader.get_today_filename()
-        
-        # 保存文章
-        articles_content = ""
-        for entry in entries:
-            # 获取文章内容
-            article_content = atlantic_rss_reader.fetch_article_content(entry['link'])
-            if article_content:
-                articles_content += atlantic_rss_reader.format_article(entry) + "\n\n"
-        
-        # 保存到文件
-        if articles_content:
-            articles_path = os.path.join(atlantic_rss_reader.ARTICLES_DIR, today_file)
-            with open(articles_path, 'w', encoding='utf-8') as f:
-                f.write(articles_content)
-            print(f"文章已保存到: {articles_path}")
-            
-            # 2. 生成综述
-            articles = gemini_summarizer.load_articles()
-            if articles:
-                summary = gemini_summarizer.call_gemini_api(prompt=gemini_summarizer.DEFAULT_PROMPT, articles=articles)
-                if summary:
-                    gemini_summarizer.save_daily_brief(summary)
-                    
-                    # 3. 更新RSS feed
-                    fg = rss_generator.generate_feed()
-                    rss_generator.save_feed(fg)
-                    
-                    # 4. 同步到Git仓库
-                    github_sync.sync_feed_to_github() # <--- 修改这里
-    except Exception as e:
-        print(f"处理文章时出错: {str(e)}")
-
 # Flask路由
 @app.route("/feed.xml")
 def get_feed():
-    try:
-        with open(rss_generator.FEED_FILE, 'r', encoding='utf-8') as f:
-            content = f.read()
-        return Response(content, mimetype="application/xml")
-    except Exception as e:
-        print(f"读取feed.xml失败: {str(e)}")
+    feed = feed_cache.get()
+    if feed is None:
         return Response("Feed not found", status=404)
+    # 按 Accept-Encoding 选择预压缩版本，请求时不做任何压缩
+    encoding = choose_encoding(request.accept_encodings, feed.variants)
+    body, etag = feed.representation(encoding)
+    response = Response(body, mimetype="application/xml")
+    if encoding:
+        response.content_encoding = encoding
+    response.vary.add('Accept-Encoding')
+    response.set_etag(etag)
+    response.last_modified = feed.last_modified
+    # 根据 If-None-Match / If-Modified-Since 返回304
+    return response.make_conditional(request)
+
+@app.route("/archive/<name>")
+def get_archive(name):
+    # 归档页生成后不再变化，直接作为静态文件返回（支持条件请求）
+    if not re.fullmatch(r'feed-\d+\.xml', name):
+        abort(404)
+    return send_from_directory(os.path.abspath(rss_generator.ARCHIVE_DIR), name, mimetype="application/xml")
 
 @app.route("/health")
 def health_check():
     return {"status": "ok"}
 
+@app.route("/jobs")
+def job_status():
+    # 当前定时任务主节点及各任务最近一次运行的状态
+    return job_runner.status_snapshot()
+
 # 初始化函数
 def init_app():
-    # 1. 初始化时同步feed.xml
-    github_sync.sync_feed_to_github() # <--- 修改这里
+    if RUN_MODE != 'all':
+        # web 模式只提供HTTP服务，定时任务由 worker.py 运行
+        print(f"RUN_MODE={RUN_MODE}，不在Web进程中运行定时任务")
+        return
     
-    # 2. 设置定时任务 - 每天北京时间中午12点执行
-    scheduler.add_job(
-        id='process_articles',
-        func=process_articles,
-        trigger=CronTrigger(hour=12, minute=0, timezone=pytz.timezone('Asia/Shanghai'))
-    )
+    # 多个Web进程中只有获得主节点锁的一个运行定时任务，其余进程在后台等待接替
+    def start():
+        jobs.start_background_sync()
+        jobs.register_jobs(scheduler)
+        scheduler.start()
     
-    # 3. 设置保活任务 - 如果设置了URL，每5分钟ping一次
-    ping_url = os.environ.get('PING_URL')
-    if ping_url:
-        def ping_self():
-            try:
-                with httpx.Client() as client:
-                    client.get(ping_url)
-                    print(f"Successfully pinged {ping_url}")
-            except Exception as e:
-                print(f"Ping failed: {str(e)}")
-        
-        scheduler.add_job(
-            id='ping_self',
-            func=ping_self,
-            trigger=IntervalTrigger(minutes=5)
-        )
+    job_runner.run_as_leader(start, wait=False)
 
 # 初始化应用
 init_app()
-# 启动调度器
-scheduler.start()
 
 if __name__ == "__main__":
     app.run(host='0.0.0.0', port=8000)
\ No newline at end of file
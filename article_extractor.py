@@ -0,0 +1,169 @@
+import os
+from bs4 import BeautifulSoup
+from lxml import etree
+import lxml.html
+
+# 正文提取后端：lxml 为单遍快速路径，bs4 为兼容后备
+EXTRACTOR_BACKEND = os.environ.get("EXTRACTOR_BACKEND", "lxml")
+
+# 正文中需要提取的元素
+CONTENT_TAGS = ('p', 'h2', 'h3', 'h4', 'blockquote', 'ul', 'ol')
+LIST_TAGS = ('ul', 'ol')
+
+
+def _class_xpath(tag, class_name):
+    """按class中的单个类名匹配元素（与BeautifulSoup的class_匹配规则一致）"""
+    return etree.XPath(
+        f"(//{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')])[1]"
+    )
+
+
+# 预编译的选择器，按优先级查找文章正文容器
+CONTAINER_XPATHS = [
+    _class_xpath('div', 'article-body'),
+    _class_xpath('div', 'article-content'),
+    etree.XPath("(//article)[1]"),
+    _class_xpath('div', 'article'),
+]
+TITLE_XPATH = etree.XPath("(//h1)[1]")
+AUTHOR_XPATH = _class_xpath('a', 'byline')
+DATE_XPATH = etree.XPath("(//time)[1]")
+
+
+def format_content(title_text, author_text, date_text, processed_elements):
+    """组合标题、作者信息与正文段落"""
+    full_content = []
+    if title_text:
+        full_content.append(f"# {title_text}\n")
+    if author_text or date_text:
+        full_content.append(f"作者: {author_text} | 发布时间: {date_text}\n")
+    full_content.extend(processed_elements)
+    return '\n\n'.join(full_content)
+
+
+def _first_text(xpath, root):
+    found = xpath(root)
+    return found[0].text_content().strip() if found else ''
+
+
+def extract_with_lxml(page_html, url):
+    """使用lxml和预编译XPath单遍提取正文"""
+    root = lxml.html.document_fromstring(page_html)
+
+    article_container = None
+    for xpath in CONTAINER_XPATHS:
+        found = xpath(root)
+        if found:
+            article_container = found[0]
+            break
+
+    if article_container is None:
+        # 由 extract() 回退到BeautifulSoup再次确认
+        return None
+
+    processed_elements = []
+    for element in article_container.iter(*CONTENT_TAGS):
+        # 列表中的内容已由所在列表的 li 输出，不再重复提取
+        parent = element.getparent()
+        in_list = False
+        while parent is not None and parent is not article_container:
+            if parent.tag in LIST_TAGS:
+                in_list = True
+                break
+            parent = parent.getparent()
+        if in_list:
+            continue
+
+        if element.tag in LIST_TAGS:
+            processed_elements.append('\n'.join(f"- {item.text_content().strip()}" for item in element.iter('li')))
+        else:
+            text = element.text_content().strip()
+            if text:  # 只添加非空文本
+                processed_elements.append(text)
+
+    return format_content(_first_text(TITLE_XPATH, root), _first_text(AUTHOR_XPATH, root),
+                          _first_text(DATE_XPATH, root), processed_elements)
+
+
+def extract_with_bs4(page_html, url):
+    """使用BeautifulSoup提取正文"""
+    soup = BeautifulSoup(page_html, 'lxml')
+
+    # 查找文章正文容器 - 尝试多个可能的选择器
+    article_container = None
+    selectors = [
+        ('div', {'class_': 'article-body'}),
+        ('div', {'class_': 'article-content'}),
+        ('article', {}),
+        ('div', {'class_': 'article'})
+    ]
+
+    for tag, attrs in selectors:
+        article_container = soup.find(tag, attrs)
+        if article_container:
+            break
+
+    if not article_container:
+        print(f"无法找到文章容器: {url}")
+        return None
+
+    # 提取文章标题
+    title = soup.find('h1')
+    title_text = title.get_text().strip() if title else ''
+
+    # 提取作者信息
+    author = soup.find('a', class_='byline')
+    author_text = author.get_text().strip() if author else ''
+
+    # 提取发布日期
+    date = soup.find('time')
+    date_text = date.get_text().strip() if date else ''
+
+    # 提取文章内容，包括更多的HTML元素
+    content_elements = article_container.find_all(list(CONTENT_TAGS))
+
+    # 处理列表元素
+    processed_elements = []
+    for element in content_elements:
+        # 列表中的内容已由所在列表的 li 输出，不再重复提取
+        in_list = False
+        for parent in element.parents:
+            if parent is article_container:
+                break
+            if parent.name in LIST_TAGS:
+                in_list = True
+                break
+        if in_list:
+            continue
+
+        if element.name in LIST_TAGS:
+            list_items = element.find_all('li')
+            list_text = '\n'.join(f"- {item.get_text().strip()}" for item in list_items)
+            processed_elements.append(list_text)
+        else:
+            text = element.get_text().strip()
+            if text:  # 只添加非空文本
+                processed_elements.append(text)
+
+    return format_content(title_text, author_text, date_text, processed_elements)
+
+
+BACKENDS = {
+    'lxml': extract_with_lxml,
+    'bs4': extract_with_bs4,
+}
+
+
+def extract(page_html, url, backend=None):
+    """从文章页面HTML中提取正文，快速后端失败时回退到BeautifulSoup"""
+    backend = backend or EXTRACTOR_BACKEND
+    extractor = BACKENDS.get(backend, extract_with_bs4)
+    if extractor is extract_with_bs4:
+        return extract_with_bs4(page_html, url)
+    try:
+        content = extractor(page_html, url)
+        if content is not None:
+            return content
+    except Exception as e:
+        print(f"{backend} 提取失败，回退到BeautifulSoup {url}: {str(e)}")
+    return extract_with_bs4(page_html, url)
@@ -0,0 +1,103 @@
+import datetime
+import os
+import sqlite3
+import threading
+
+from seen_index import content_hash
+
+# 结构化文章存储的SQLite数据库路径，articles/*.md 为由其导出的可读视图
+ARTICLE_STORE_DB = os.environ.get("ARTICLE_STORE_DB", "state/articles.db")
+
+# 流水线逐篇写入时使用的暂存日期后缀，运行成功后才替换当天的正式记录
+STAGING_SUFFIX = ".staging"
+
+_INSERT = """INSERT OR REPLACE INTO articles
+             (date, position, url, title, published, summary, body, content_hash, stored_at)
+             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+
+
+class ArticleStore:
+    """按日期保存文章记录（标题、链接、发布时间、摘要、正文及哈希），支持按日期和URL随机访问"""
+
+    def __init__(self, path=None):
+        self.path = path or ARTICLE_STORE_DB
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._conn:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS articles (
+                    date TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    url TEXT NOT NULL,
+                    title TEXT,
+                    published TEXT,
+                    summary TEXT,
+                    body TEXT,
+                    content_hash TEXT,
+                    stored_at TEXT,
+                    PRIMARY KEY (date, url)
+                )"""
+            )
+
+    def close(self):
+        self._conn.close()
+
+    @staticmethod
+    def _row(date_str, position, record, stored_at):
+        body = record.get('body') or ''
+        return (date_str, position, record['url'], record.get('title'), record.get('published'),
+                record.get('summary'), body, content_hash(body) if body else None, stored_at)
+
+    def save_day(self, date_str, records):
+        """写入某一天的全部文章记录（覆盖该日期已有的记录），保持传入顺序"""
+        now = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        rows = [self._row(date_str, position, record, now) for position, record in enumerate(records)]
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM articles WHERE date = ?", (date_str,))
+            self._conn.executemany(_INSERT, rows)
+        return len(rows)
+
+    def save_article(self, date_str, position, record):
+        """写入（或替换）某一天的单篇文章记录，供流水线逐篇写入"""
+        now = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        with self._lock, self._conn:
+            self._conn.execute(_INSERT, self._row(date_str, position, record, now))
+
+    @staticmethod
+    def staging_date(date_str):
+        """某一天的暂存日期键"""
+        return date_str + STAGING_SUFFIX
+
+    def commit_day(self, date_str):
+        """在同一事务中用暂存的文章记录替换该日期已有的记录，返回替换后的篇数"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM articles WHERE date = ?", (date_str,))
+            cursor = self._conn.execute("UPDATE articles SET date = ? WHERE date = ?",
+                                        (date_str, self.staging_date(date_str)))
+        return cursor.rowcount
+
+    def load_day(self, date_str):
+        """按原顺序返回某一天的文章记录，没有记录时返回空列表"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM articles WHERE date = ? ORDER BY position", (date_str,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get(self, date_str, url):
+        """返回某一天中指定URL的文章记录，不存在时返回None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM articles WHERE date = ? AND url = ?", (date_str, url)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def dates(self):
+        """返回存储中有文章的日期（升序）"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT date FROM articles WHERE date NOT LIKE ? ORDER BY date", ('%' + STAGING_SUFFIX,)
+            ).fetchall()
+        return [row[0] for row in rows]
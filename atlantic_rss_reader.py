@@ -4,11 +4,20 @@ import time
 import requests
 import xml.etree.ElementTree as ET
 import html
+import io
 import re
-from bs4 import BeautifulSoup
+import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from email.utils import parsedate_to_datetime
 from datetime import timezone
 from zoneinfo import ZoneInfo
+from rate_limiter import HostRateLimiter
+from retry_policy import parse_retry_after
+import http_client
+import article_extractor
+import instrumentation
+from article_store import ArticleStore
 
 # RSS源URL
 RSS_URL = "https://www.theatlantic.com/feed/all/"
@@ -16,6 +25,51 @@ RSS_URL = "https://www.theatlantic.com/feed/all/"
 # 文章保存目录
 ARTICLES_DIR = "articles"
 
+# Atom命名空间下的元素标签
+ATOM_NS = '{http://www.w3.org/2005/Atom}'
+ATOM_ENTRY = ATOM_NS + 'entry'
+ATOM_TITLE = ATOM_NS + 'title'
+ATOM_LINK = ATOM_NS + 'link'
+ATOM_PUBLISHED = ATOM_NS + 'published'
+ATOM_UPDATED = ATOM_NS + 'updated'
+ATOM_ID = ATOM_NS + 'id'
+ATOM_SUMMARY = ATOM_NS + 'summary'
+
+# 处理水位状态文件，记录已处理文章中最新的发布时间
+READER_STATE_FILE = os.environ.get("READER_STATE_FILE", "state/reader_state.json")
+
+# 连续遇到多少篇不晚于水位的文章后停止解析（容忍源中少量乱序的文章）
+READER_STALE_LIMIT = int(os.environ.get("READER_STALE_LIMIT", "5"))
+
+# 文章页面磁盘缓存目录（可选），设置后使用ETag/Last-Modified进行重新验证
+ARTICLE_CACHE_DIR = os.environ.get("ARTICLE_CACHE_DIR")
+
+# 请求文章页面使用的请求头
+ARTICLE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1'
+}
+
+# 并发抓取配置：并行数、每个主机每秒请求数、突发容量、失败重试次数
+# 默认每秒4次、突发4次与并行数一致，60篇文章约15秒抓完；遇到429时按 Retry-After 退避
+FETCH_WORKERS = int(os.environ.get("FETCH_WORKERS", "4"))
+FETCH_RATE = float(os.environ.get("FETCH_RATE", "4"))
+FETCH_BURST = int(os.environ.get("FETCH_BURST", "4"))
+FETCH_MAX_RETRIES = int(os.environ.get("FETCH_MAX_RETRIES", "3"))
+FETCH_BACKOFF = 2  # 重试退避基数，单位秒
+
+# 需要重试的HTTP状态码
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# 按主机限速，替代原来每次请求前固定 sleep 3 秒
+_rate_limiter = HostRateLimiter(FETCH_RATE, FETCH_BURST)
+
+# 本次运行内的文章内容缓存，键为文章URL
+_article_cache = {}
+
 def setup_directory():
     """确保articles目录存在"""
     if not os.path.exists(ARTICLES_DIR):
@@ -35,11 +89,12 @@ def fetch_rss_feed():
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'application/rss+xml, application/xml, application/atom+xml, text/xml, */*'
         }
-        response = requests.get(RSS_URL, headers=headers, timeout=10, verify=True)
+        response = http_client.get_session('atlantic').get(RSS_URL, headers=headers, timeout=10, verify=True)
         response.raise_for_status()
+        instrumentation.count('rss_bytes', len(response.content))
         print(f"RSS源响应状态码: {response.status_code}")
         print(f"RSS源响应头: {dict(response.headers)}")
-        return response.text
+        return response.content
     except requests.exceptions.RequestException as e:
         print(f"获取RSS源失败: {str(e)}")
         print(f"详细错误信息: {repr(e)}")
@@ -50,81 +105,141 @@ def fetch_rss_feed():
         return None
 
 def get_last_build_date():
-    """从feed.xml获取上次构建时间(GMT+0)"""
+    """从feed.xml获取上次构建时间(GMT+0)，读到lastBuildDate即停止解析"""
     try:
         if not os.path.exists('feed.xml'):
             return None
-        tree = ET.parse('feed.xml')
-        root = tree.getroot()
-        last_build_date = root.find('.//lastBuildDate')
-        if last_build_date is not None and last_build_date.text:
-            return parsedate_to_datetime(last_build_date.text)
+        for _, elem in ET.iterparse('feed.xml', events=('end',)):
+            if elem.tag == 'lastBuildDate':
+                return parsedate_to_datetime(elem.text) if elem.text else None
+            if elem.tag == 'item':
+                # lastBuildDate位于所有item之前，读到item说明不存在
+                return None
         return None
     except Exception as e:
         print(f"获取lastBuildDate失败: {str(e)}")
         return None
 
-def parse_rss(xml_content):
-    """解析RSS XML内容"""
+def load_watermark():
+    """读取上次处理到的文章发布时间；状态文件不存在时回退到feed.xml的lastBuildDate"""
     try:
-        # 获取上次构建时间
-        last_build_date = get_last_build_date()
-        print(f"上次构建时间: {last_build_date}")
+        with open(READER_STATE_FILE, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get('watermark'):
+            return datetime.datetime.fromisoformat(state['watermark'])
+    except (OSError, ValueError):
+        pass
+    return get_last_build_date()
+
+def save_watermark(watermark):
+    """保存处理水位到状态文件"""
+    os.makedirs(os.path.dirname(READER_STATE_FILE) or '.', exist_ok=True)
+    tmp_file = READER_STATE_FILE + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump({'watermark': watermark.isoformat()}, f)
+    os.replace(tmp_file, READER_STATE_FILE)
+
+def parse_published(text):
+    """将Atom发布时间转换为GMT+0时间"""
+    et_time = datetime.datetime.fromisoformat(text.replace('Z', '+00:00'))
+    et_time = et_time.astimezone(ZoneInfo('America/New_York'))
+    return et_time.astimezone(timezone.utc)
+
+def entry_time(entry):
+    """文章的发布时间与更新时间中较晚的一个，两者都没有时返回None"""
+    times = [parse_published(entry[key]) for key in ('published', 'updated')
+             if entry.get(key) and entry[key] != '未知日期']
+    return max(times) if times else None
+
+def update_watermark(entries, failed=()):
+    """将水位推进到已处理文章中最新的发布（或更新）时间
+
+    failed 为抓取或抽取失败的文章；水位不会越过其中最早的一篇，下次运行时重新抓取。
+    """
+    def published_times(items):
+        return [value for value in map(entry_time, items) if value is not None]
+    
+    published = published_times(entries)
+    failed_times = published_times(failed)
+    if failed_times:
+        oldest_failed = min(failed_times)
+        published = [value for value in published if value < oldest_failed]
+    if not published:
+        return None
+    watermark = max(published)
+    current = load_watermark()
+    if current is None or watermark > current:
+        save_watermark(watermark)
+        print(f"处理水位已更新为: {watermark}")
+    return watermark
+
+def _element_text(elem):
+    """读取Atom文本元素，type为html时解码实体"""
+    return elem.get('type') == 'html' and html.unescape(elem.text) or elem.text
+
+def iter_entries(xml_content, since=None):
+    """流式解析Atom源，逐篇生成文章条目
+
+    发布和更新时间都不晚于since的文章被跳过；源中的文章大致按时间从新到旧排列，
+    连续 READER_STALE_LIMIT 篇都不晚于since时停止解析。
+    """
+    if isinstance(xml_content, str):
+        xml_content = xml_content.encode('utf-8')
+    
+    stale = 0
+    for _, item in ET.iterparse(io.BytesIO(xml_content), events=('end',)):
+        if item.tag != ATOM_ENTRY:
+            continue
+        entry = {}
         
-        # 解析XML
-        root = ET.fromstring(xml_content)
+        # 提取发布日期
+        published_elem = item.find(ATOM_PUBLISHED)
+        if published_elem is not None and published_elem.text:
+            entry['published'] = published_elem.text
+        else:
+            entry['published'] = '未知日期'
         
-        # 获取Atom命名空间
-        namespaces = {'atom': 'http://www.w3.org/2005/Atom'}
+        # 提取GUID和更新时间，用于跨运行去重
+        entry['id'] = item.findtext(ATOM_ID)
+        entry['updated'] = item.findtext(ATOM_UPDATED)
         
-        # 查找所有entry元素
-        entries = []
-        items = root.findall('.//atom:entry', namespaces)
+        # 发布和更新时间都不晚于水位的文章已处理过，跳过
+        if since is not None:
+            timestamp = entry_time(entry)
+            if timestamp is not None and timestamp <= since:
+                item.clear()
+                stale += 1
+                if stale >= READER_STALE_LIMIT:
+                    break
+                continue
+            stale = 0
         
-        print(f"找到 {len(items)} 个文章条目")
+        # 提取标题
+        title_elem = item.find(ATOM_TITLE)
+        entry['title'] = _element_text(title_elem) if title_elem is not None else '无标题'
         
-        for item in items:
-            entry = {}
-            
-            # 提取标题
-            title_elem = item.find('atom:title', namespaces)
-            if title_elem is not None:
-                entry['title'] = title_elem.get('type') == 'html' and html.unescape(title_elem.text) or title_elem.text
-            else:
-                entry['title'] = '无标题'
-            
-            # 提取链接
-            link_elem = item.find("atom:link[@rel='alternate']", namespaces)
-            if link_elem is not None:
+        # 提取链接
+        entry['link'] = '#'
+        for link_elem in item.findall(ATOM_LINK):
+            if link_elem.get('rel') == 'alternate':
                 entry['link'] = link_elem.get('href')
-            else:
-                entry['link'] = '#'
-            
-            # 提取发布日期
-            published_elem = item.find('atom:published', namespaces)
-            if published_elem is not None and published_elem.text:
-                # 将ET时间转换为GMT+0时间进行比较
-                et_time = datetime.datetime.fromisoformat(published_elem.text.replace('Z', '+00:00'))
-                et_time = et_time.astimezone(ZoneInfo('America/New_York'))
-                gmt_time = et_time.astimezone(timezone.utc)
-                
-                # 只保留比lastBuildDate新的文章
-                if last_build_date is None or gmt_time > last_build_date:
-                    entry['published'] = published_elem.text
-                else:
-                    continue
-            else:
-                entry['published'] = '未知日期'
-            
-            # 提取摘要
-            summary_elem = item.find('atom:summary', namespaces)
-            if summary_elem is not None:
-                entry['summary'] = summary_elem.get('type') == 'html' and html.unescape(summary_elem.text) or summary_elem.text
-            else:
-                entry['summary'] = '无摘要'
-            
-            entries.append(entry)
+                break
+        
+        # 提取摘要
+        summary_elem = item.find(ATOM_SUMMARY)
+        entry['summary'] = _element_text(summary_elem) if summary_elem is not None else '无摘要'
+        
+        # 释放已处理的元素，保持内存占用稳定
+        item.clear()
+        yield entry
+
+def parse_rss(xml_content):
+    """解析RSS XML内容，只返回比处理水位新的文章"""
+    try:
+        watermark = load_watermark()
+        print(f"处理水位: {watermark}")
         
+        entries = list(iter_entries(xml_content, since=watermark))
         print(f"解析到 {len(entries)} 篇文章")
         return entries
     except Exception as e:
@@ -140,126 +255,200 @@ def clean_html(html_text):
     clean_text = html.unescape(clean_text)
     return clean_text
 
-def fetch_article_content(url):
-    """从文章URL获取正文内容"""
+def clear_article_cache():
+    """清空本次运行的文章内容缓存，每次任务开始时调用"""
+    _article_cache.clear()
+
+def _page_cache_paths(url):
+    """返回URL对应的磁盘缓存文件路径(页面, 元数据)"""
+    key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+    return (os.path.join(ARTICLE_CACHE_DIR, f"{key}.html"),
+            os.path.join(ARTICLE_CACHE_DIR, f"{key}.json"))
+
+def load_cached_page(url):
+    """从磁盘缓存读取页面及其ETag/Last-Modified，未启用或未命中时返回(None, {})"""
+    if not ARTICLE_CACHE_DIR:
+        return None, {}
+    page_path, meta_path = _page_cache_paths(url)
     try:
-        # 添加延迟以避免请求过于频繁
-        time.sleep(3)
-        
-        # 设置请求头
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1'
-        }
-        
-        # 发送请求获取页面内容
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
-        
-        # 使用BeautifulSoup解析HTML
-        soup = BeautifulSoup(response.text, 'lxml')
-        
-        # 查找文章正文容器 - 尝试多个可能的选择器
-        article_container = None
-        selectors = [
-            ('div', {'class_': 'article-body'}),
-            ('div', {'class_': 'article-content'}),
-            ('article', {}),
-            ('div', {'class_': 'article'})
-        ]
-        
-        for tag, attrs in selectors:
-            article_container = soup.find(tag, attrs)
-            if article_container:
-                break
-        
-        if not article_container:
-            print(f"无法找到文章容器: {url}")
-            return None
-        
-        # 提取文章标题
-        title = soup.find('h1')
-        title_text = title.get_text().strip() if title else ''
-        
-        # 提取作者信息
-        author = soup.find('a', class_='byline')
-        author_text = author.get_text().strip() if author else ''
-        
-        # 提取发布日期
-        date = soup.find('time')
-        date_text = date.get_text().strip() if date else ''
-        
-        # 提取文章内容，包括更多的HTML元素
-        content_elements = article_container.find_all(['p', 'h2', 'h3', 'h4', 'blockquote', 'ul', 'ol'])
-        
-        # 处理列表元素
-        processed_elements = []
-        for element in content_elements:
-            if element.name in ['ul', 'ol']:
-                list_items = element.find_all('li')
-                list_text = '\n'.join(f"- {item.get_text().strip()}" for item in list_items)
-                processed_elements.append(list_text)
-            else:
-                text = element.get_text().strip()
-                if text:  # 只添加非空文本
-                    processed_elements.append(text)
-        
-        # 组合所有内容
-        full_content = []
-        if title_text:
-            full_content.append(f"# {title_text}\n")
-        if author_text or date_text:
-            full_content.append(f"作者: {author_text} | 发布时间: {date_text}\n")
-        full_content.extend(processed_elements)
-        
-        return '\n\n'.join(full_content)
-        
-    except requests.exceptions.RequestException as e:
-        print(f"请求文章失败 {url}: {str(e)}")
-        return None
-    except Exception as e:
-        print(f"获取文章内容失败 {url}: {str(e)}")
-        print(f"详细错误信息: {repr(e)}")
-        return None
+        with open(page_path, 'r', encoding='utf-8') as f:
+            page = f.read()
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        return page, meta
+    except (OSError, ValueError):
+        return None, {}
 
-def format_article(entry):
-    """将RSS条目格式化为Markdown"""
-    title = entry.get('title', '无标题')
-    link = entry.get('link', '#')
-    published = entry.get('published', '未知日期')
-    summary = entry.get('summary', '无摘要')
+def save_cached_page(url, page, response_headers):
+    """将页面及其校验头写入磁盘缓存"""
+    if not ARTICLE_CACHE_DIR:
+        return
+    meta = {
+        'url': url,
+        'etag': response_headers.get('ETag'),
+        'last_modified': response_headers.get('Last-Modified')
+    }
+    if not meta['etag'] and not meta['last_modified']:
+        # 没有校验头就无法重新验证，不写缓存
+        return
+    try:
+        os.makedirs(ARTICLE_CACHE_DIR, exist_ok=True)
+        page_path, meta_path = _page_cache_paths(url)
+        with open(page_path, 'w', encoding='utf-8') as f:
+            f.write(page)
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+    except OSError as e:
+        print(f"写入页面缓存失败 {url}: {str(e)}")
+
+def get_retry_delay(response, attempt):
+    """计算重试等待时间，优先使用服务器返回的Retry-After"""
+    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+    if retry_after is not None:
+        return retry_after
+    return FETCH_BACKOFF * (2 ** attempt)
+
+def fetch_article_html(url, stats=None):
+    """下载文章页面HTML，启用磁盘缓存时发送条件请求
+
+    stats 字典会被填入限速等待时间、尝试次数、状态码、字节数和是否命中缓存。
+    """
+    stats = stats if stats is not None else {}
+    headers = dict(ARTICLE_HEADERS)
+    cached_page, meta = load_cached_page(url)
+    if cached_page is not None:
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+    
+    for attempt in range(FETCH_MAX_RETRIES + 1):
+        # 按主机限速，避免请求过于频繁
+        stats['rate_wait'] = stats.get('rate_wait', 0.0) + _rate_limiter.acquire(url)
+        stats['attempts'] = attempt + 1
+        response = http_client.get_session('atlantic').get(url, headers=headers)
+        stats['status'] = response.status_code
+        if response.status_code not in RETRY_STATUS_CODES or attempt == FETCH_MAX_RETRIES:
+            break
+        delay = get_retry_delay(response, attempt)
+        stats['retry_wait'] = stats.get('retry_wait', 0.0) + delay
+        print(f"请求文章返回 {response.status_code}，{delay:.1f} 秒后重试 ({attempt + 1}/{FETCH_MAX_RETRIES}): {url}")
+        time.sleep(delay)
+    
+    if response.status_code == 304 and cached_page is not None:
+        print(f"页面未修改，使用缓存: {url}")
+        stats['cached'] = True
+        return cached_page
+    response.raise_for_status()
+    stats['bytes'] = len(response.content)
+    instrumentation.count('article_bytes', stats['bytes'])
+    
+    save_cached_page(url, response.text, response.headers)
+    return response.text
+
+def extract_article_content(page_html, url):
+    """从文章页面HTML中提取正文内容"""
+    return article_extractor.extract(page_html, url)
+
+def fetch_article_content(url):
+    """从文章URL获取正文内容，同一次运行内每个URL只下载一次"""
+    if url in _article_cache:
+        return _article_cache[url]
     
-    # 清理HTML标签
-    clean_summary = clean_html(summary)
+    content = None
+    with instrumentation.span('article', url=url) as span:
+        try:
+            started = time.monotonic()
+            page_html = fetch_article_html(url, span)
+            span['fetch'] = round(time.monotonic() - started, 4)
+            started = time.monotonic()
+            content = extract_article_content(page_html, url)
+            span['extract'] = round(time.monotonic() - started, 4)
+        except requests.exceptions.RequestException as e:
+            print(f"请求文章失败 {url}: {str(e)}")
+            span['error'] = str(e)
+        except Exception as e:
+            print(f"获取文章内容失败 {url}: {str(e)}")
+            print(f"详细错误信息: {repr(e)}")
+            span['error'] = str(e)
+        span['ok'] = content is not None
     
-    # 获取文章正文
-    content = fetch_article_content(link)
-    if content:
-        article_body = f"### 正文\n\n{content}"
+    # 失败结果同样缓存，避免同一次运行中重复请求
+    _article_cache[url] = content
+    return content
+
+def fetch_article_page(url):
+    """只下载文章页面并记录抓取跨度，失败时返回None（正文抽取由流水线的下一阶段完成）"""
+    with instrumentation.span('article', url=url) as span:
+        try:
+            started = time.monotonic()
+            page_html = fetch_article_html(url, span)
+            span['fetch'] = round(time.monotonic() - started, 4)
+        except requests.exceptions.RequestException as e:
+            print(f"请求文章失败 {url}: {str(e)}")
+            span['error'] = str(e)
+            page_html = None
+        span['ok'] = page_html is not None
+    return page_html
+
+def fetch_articles(entries, max_workers=None):
+    """并发获取多篇文章正文，返回与entries顺序一致的内容列表"""
+    if not entries:
+        return []
+    workers = max(1, min(max_workers or FETCH_WORKERS, len(entries)))
+    print(f"开始并发获取 {len(entries)} 篇文章 (并行数: {workers})")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # executor.map 按输入顺序返回结果，保持RSS源中的文章顺序
+        return list(executor.map(fetch_article_content, [entry['link'] for entry in entries]))
+
+def build_article_record(entry, content=None):
+    """将RSS条目和正文整理为结构化的文章记录，content未提供时自动获取"""
+    link = entry.get('link', '#')
+    # 获取文章正文（已缓存时不会重复下载）
+    if content is None:
+        content = fetch_article_content(link)
+    return {
+        'title': entry.get('title', '无标题'),
+        'url': link,
+        'published': entry.get('published', '未知日期'),
+        # 清理HTML标签
+        'summary': clean_html(entry.get('summary', '无摘要')),
+        'body': content or '',
+    }
+
+def format_record(record):
+    """将文章记录渲染为Markdown"""
+    if record['body']:
+        article_body = f"### 正文\n\n{record['body']}"
     else:
         article_body = ""
     
     # 格式化为Markdown
-    markdown = f"## {title}\n\n"
-    markdown += f"*发布时间: {published}*\n\n"
-    markdown += f"[原文链接]({link})\n\n"
-    markdown += f"{clean_summary}\n\n"
+    markdown = f"## {record['title']}\n\n"
+    markdown += f"*发布时间: {record['published']}*\n\n"
+    markdown += f"[原文链接]({record['url']})\n\n"
+    markdown += f"{record['summary']}\n\n"
     markdown += f"{article_body}\n\n"
     markdown += "---\n\n"
     
     return markdown
 
-def save_articles_to_file(articles_markdown):
-    """将文章保存到当天的Markdown文件"""
+def format_article(entry, content=None):
+    """将RSS条目格式化为Markdown，content为已获取的正文，未提供时自动获取"""
+    return format_record(build_article_record(entry, content))
+
+def save_articles_to_file(articles_markdown, date_str=None):
+    """将文章保存到当天（或date_str指定日期）的Markdown文件"""
     if not articles_markdown:
         print("没有文章需要保存")
         return
     
-    filename = os.path.join(ARTICLES_DIR, get_today_filename())
-    today_date = datetime.datetime.now().strftime("%Y年%m月%d日")
+    if date_str:
+        filename = os.path.join(ARTICLES_DIR, f"{date_str}.md")
+        today_date = datetime.datetime.strptime(date_str, "%Y%m%d").strftime("%Y年%m月%d日")
+    else:
+        filename = os.path.join(ARTICLES_DIR, get_today_filename())
+        today_date = datetime.datetime.now().strftime("%Y年%m月%d日")
     
     header = f"# The Atlantic 每日文章 - {today_date}\n\n"
     content = header + articles_markdown
@@ -271,9 +460,23 @@ def save_articles_to_file(articles_markdown):
     except Exception as e:
         print(f"保存文件失败: {str(e)}")
 
+def save_articles(records, date_str=None):
+    """将文章记录写入结构化存储，并导出当天的Markdown文件作为可读视图"""
+    if not records:
+        print("没有文章需要保存")
+        return
+    date_str = date_str or os.path.splitext(get_today_filename())[0]
+    store = ArticleStore()
+    try:
+        store.save_day(date_str, records)
+    finally:
+        store.close()
+    save_articles_to_file(''.join(format_record(record) for record in records), date_str)
+
 def process_feed():
     """处理RSS源并保存文章"""
     setup_directory()
+    clear_article_cache()
     xml_content = fetch_rss_feed()
     
     if not xml_content:
@@ -281,12 +484,10 @@ def process_feed():
     
     entries = parse_rss(xml_content)
     
-    all_articles = ""
-    for entry in entries:
-        article_markdown = format_article(entry)
-        all_articles += article_markdown
+    contents = fetch_articles(entries)
     
-    save_articles_to_file(all_articles)
+    records = [build_article_record(entry, content) for entry, content in zip(entries, contents)]
+    save_articles(records)
 
 def main():
     try:
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""正文提取后端的微基准测试
+
+用 articles/ 中保存的文章正文合成与 The Atlantic 页面结构相近的HTML，
+分别用 lxml 和 BeautifulSoup 后端提取，校验结果一致并比较耗时。
+
+用法: python benchmarks/bench_extractor.py [--repeat N]
+"""
+
+import argparse
+import glob
+import html
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import article_extractor  # noqa: E402
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8"><title>{title}</title>
+<script>window.dataLayer = [];</script><style>.x {{ color: red; }}</style></head>
+<body><header><nav><ul>{nav}</ul></nav></header>
+<main><h1 class="headline">{title}</h1>
+<div class="byline-area"><a class="byline" href="#">Staff Writer</a><time datetime="2025-04-07">{published}</time></div>
+<article><div class="article-body">{body}</div></article>
+<aside><p>Subscribe to The Atlantic.</p></aside></main>
+<footer><ul>{nav}</ul></footer></body></html>"""
+
+
+def load_saved_articles():
+    """从 articles/*.md 中读取文章标题、发布时间和正文段落"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    articles = []
+    for path in sorted(glob.glob(os.path.join(root, 'articles', '*.md'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            sections = f.read().split('\n## ')[1:]
+        for section in sections:
+            title = section.split('\n', 1)[0].strip()
+            body = section.split('### 正文', 1)[-1]
+            paragraphs = [p.strip() for p in body.split('\n\n')
+                          if p.strip() and not p.strip().startswith(('#', '作者:', '---'))]
+            articles.append((title, paragraphs))
+    return articles
+
+
+def build_page(title, paragraphs):
+    """把文章段落渲染为带导航、脚本、列表等干扰元素的页面"""
+    parts = []
+    for index, paragraph in enumerate(paragraphs):
+        text = html.escape(paragraph)
+        if index % 7 == 3:
+            parts.append(f"<h2>{text[:60]}</h2>")
+        elif index % 11 == 5:
+            parts.append(f"<blockquote><p>{text}</p></blockquote>")
+        elif index % 13 == 8:
+            parts.append(f"<ul><li><p>{text[:80]}</p></li><li>{text[80:160]}</li></ul>")
+        else:
+            parts.append(f"<p>{text} <a href=\"#\">link</a> <em>note</em></p>")
+    nav = ''.join(f'<li><a href="/s/{i}">Section {i}</a></li>' for i in range(40))
+    return PAGE_TEMPLATE.format(title=html.escape(title), nav=nav, published='April 7, 2025',
+                                body='\n'.join(parts))
+
+
+def run(backend, pages, repeat):
+    start = time.perf_counter()
+    outputs = None
+    for _ in range(repeat):
+        outputs = [article_extractor.BACKENDS[backend](page, 'bench') for page in pages]
+    return (time.perf_counter() - start) / repeat, outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="正文提取后端微基准测试")
+    parser.add_argument("--repeat", type=int, default=5, help="重复次数")
+    args = parser.parse_args()
+
+    pages = [build_page(title, paragraphs) for title, paragraphs in load_saved_articles()]
+    total_bytes = sum(len(page.encode('utf-8')) for page in pages)
+    print(f"页面数: {len(pages)}, 总大小: {total_bytes / 1024:.0f} KB, 重复 {args.repeat} 次")
+
+    results = {}
+    for backend in ('bs4', 'lxml'):
+        elapsed, outputs = run(backend, pages, args.repeat)
+        results[backend] = outputs
+        print(f"{backend:>5}: {elapsed * 1000:8.1f} ms/轮, {total_bytes / elapsed / 1024 / 1024:6.1f} MB/s")
+
+    mismatches = sum(1 for a, b in zip(results['bs4'], results['lxml']) if a != b)
+    print(f"输出不一致的页面数: {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
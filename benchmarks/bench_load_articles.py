@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""文章文件解析（load_articles）的基准测试
+
+分别在真实的 articles/20250408.md 和合成的大文件上比较旧的逐行 += 拼接解析
+与新的单遍流式解析（gemini_summarizer.iter_article_file），并校验两者解析出的
+文章标题、链接和非空正文行一致。
+
+用法: python benchmarks/bench_load_articles.py [--size-mb 50] [--article-kb 1024] [--skip-legacy]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import gemini_summarizer  # noqa: E402
+
+REAL_FILE = os.path.join(ROOT, 'articles', '20250408.md')
+
+
+def legacy_parse(filepath):
+    """旧实现：整文件读入后逐行解析，正文用 += 拼接（最坏情况为平方复杂度）"""
+    with open(filepath, "r", encoding="utf-8") as f:
+        content = f.read()
+    articles = []
+    current_article = {}
+    for line in content.split('\n'):
+        if line.startswith('## '):
+            if current_article:
+                articles.append(current_article)
+            current_article = {'title': line[3:].strip()}
+        elif line.startswith('*发布时间:'):
+            current_article['publish_time'] = line[6:].strip()
+        elif line.startswith('[原文链接]'):
+            current_article['url'] = line[line.find('(')+1:line.find(')')]
+        elif line.startswith('### 正文'):
+            current_article['content'] = ''
+        elif 'content' in current_article and line:
+            current_article['content'] += line + '\n'
+    if current_article:
+        articles.append(current_article)
+    return articles
+
+
+def streaming_parse(filepath):
+    return list(gemini_summarizer.iter_article_file(filepath))
+
+
+def build_synthetic_file(path, size_mb, article_kb):
+    """用真实文章的段落合成指定大小的单日文章文件，每篇正文约 article_kb KB"""
+    with open(REAL_FILE, 'r', encoding='utf-8') as f:
+        paragraphs = [p for p in f.read().split('\n\n')
+                      if p.strip() and not p.startswith(('#', '*', '[', '---'))]
+    target = size_mb * 1024 * 1024
+    article_bytes = article_kb * 1024
+    written = 0
+    index = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("# The Atlantic 每日文章 - 合成数据\n\n")
+        while written < target:
+            parts = [f"## Synthetic Article {index}\n\n",
+                     "*发布时间: 2025-04-07T19:40:57-04:00*\n\n",
+                     f"[原文链接](https://www.theatlantic.com/synthetic/{index}/?utm_source=feed)\n\n",
+                     "摘要\n\n### 正文\n\n"]
+            size = 0
+            while size < article_bytes:
+                paragraph = paragraphs[(index + size) % len(paragraphs)]
+                parts.append(paragraph + "\n\n")
+                size += len(paragraph.encode('utf-8')) + 2
+            parts.append("---\n\n")
+            chunk = ''.join(parts)
+            f.write(chunk)
+            written += len(chunk.encode('utf-8'))
+            index += 1
+    return index
+
+
+def summarize(articles):
+    """用于比较的规范形式：标题、链接和非空正文行"""
+    return [(a['title'], a.get('url'),
+             [line for line in a.get('content', '').split('\n') if line and line != '---'])
+            for a in articles]
+
+
+def run(name, parse, filepath):
+    start = time.perf_counter()
+    articles = parse(filepath)
+    elapsed = time.perf_counter() - start
+    size_mb = os.path.getsize(filepath) / 1024 / 1024
+    print(f"  {name:>9}: {elapsed * 1000:10.1f} ms, {size_mb / elapsed:8.1f} MB/s, {len(articles)} 篇")
+    return articles
+
+
+def bench(label, filepath, skip_legacy):
+    print(f"{label} ({os.path.getsize(filepath) / 1024 / 1024:.1f} MB)")
+    new = run('streaming', streaming_parse, filepath)
+    if skip_legacy:
+        return 0
+    old = run('legacy', legacy_parse, filepath)
+    if summarize(old) != summarize(new):
+        print("  解析结果不一致")
+        return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文章文件解析基准测试")
+    parser.add_argument("--size-mb", type=int, default=50, help="合成文件大小（MB）")
+    parser.add_argument("--article-kb", type=int, default=1024, help="合成文件中每篇文章正文大小（KB）")
+    parser.add_argument("--skip-legacy", action="store_true", help="合成文件上不运行旧实现（其耗时随正文大小平方增长）")
+    args = parser.parse_args()
+
+    failures = bench("真实文件 articles/20250408.md", REAL_FILE, False)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'synthetic.md')
+        count = build_synthetic_file(path, args.size_mb, args.article_kb)
+        failures += bench(f"合成文件 {count} 篇 x {args.article_kb} KB", path, args.skip_legacy)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""抓取 → 抽取 → 存储 → 综述 流水线的基准测试（模拟网络与 Gemini 延迟，无需网络和 API 密钥）
+
+使用 articles/20250408.md 中的文章作为抓取结果，比较原来的顺序执行
+（全部抓取完成后再分批调用 Gemini）与 jobs.stream_articles 的流水线执行，
+并输出流水线各阶段的吞吐量和背压统计。
+
+Gemini 延迟按 基础延迟 + 每篇文章延迟 × 本批文章数 模拟（输出长度随文章数增长）。
+
+用法: python benchmarks/bench_pipeline.py [--fetch-latency 0.5] [--gemini-latency 2] [--gemini-per-article 0.5] [--workers 4]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import article_store  # noqa: E402
+import atlantic_rss_reader  # noqa: E402
+import gemini_summarizer  # noqa: E402
+import instrumentation  # noqa: E402
+import jobs  # noqa: E402
+import seen_index  # noqa: E402
+
+REAL_FILE = os.path.join(ROOT, 'articles', '20250408.md')
+
+
+def prepare(args):
+    """用真实文章构造RSS条目，并以固定延迟模拟文章下载和 Gemini 调用"""
+    articles = list(gemini_summarizer.iter_article_file(REAL_FILE))
+    entries = [{'title': article['title'], 'link': article['url'], 'published': article.get('publish_time', ''),
+                'summary': ''} for article in articles]
+    bodies = {article['url']: article.get('content', '') for article in articles}
+
+    def fetch_page(url):
+        time.sleep(args.fetch_latency)
+        return bodies[url]
+
+    def call_api(api_key=None, prompt=None, articles=None, stream_path=None, stats=None, model=None):
+        time.sleep(args.gemini_latency + args.gemini_per_article * len(articles))
+        return '\n\n'.join(f"## {article['title']}\n\n综述" for article in articles)
+
+    atlantic_rss_reader.fetch_article_page = fetch_page
+    atlantic_rss_reader.extract_article_content = lambda page_html, url: page_html
+    gemini_summarizer.call_gemini_api = call_api
+    return entries
+
+
+def run_sequential(entries, workers, date_str):
+    """原来的顺序执行：并发抓取全部文章后写入存储，再分批生成综述"""
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pages = list(executor.map(atlantic_rss_reader.fetch_article_page, [entry['link'] for entry in entries]))
+    records = []
+    for entry, page in zip(entries, pages):
+        content = atlantic_rss_reader.extract_article_content(page, entry['link'])
+        if content:
+            records.append(atlantic_rss_reader.build_article_record(entry, content))
+    atlantic_rss_reader.save_articles(records, date_str)
+    articles = [gemini_summarizer.article_from_record(record) for record in records]
+    return gemini_summarizer.summarize_articles(articles=articles, date_str=date_str)
+
+
+def run_pipelined(entries, date_str, directory):
+    """流水线执行，返回综述和各阶段统计"""
+    index = seen_index.SeenIndex()
+    store = article_store.ArticleStore()
+    summarizer = gemini_summarizer.StreamingSummarizer(date_str=date_str)
+    try:
+        with instrumentation.run('bench_pipeline', directory) as run:
+            jobs.stream_articles(entries, index, store, summarizer, date_str)
+            summary = summarizer.finish()
+        return summary, run.info['pipeline']
+    finally:
+        summarizer.close()
+        store.close()
+        index.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文章处理流水线基准测试")
+    parser.add_argument("--fetch-latency", type=float, default=0.5, help="模拟的单篇文章下载延迟（秒）")
+    parser.add_argument("--gemini-latency", type=float, default=2.0, help="模拟的单批 Gemini 调用基础延迟（秒）")
+    parser.add_argument("--gemini-per-article", type=float, default=0.5, help="模拟的每篇文章增加的 Gemini 延迟（秒）")
+    parser.add_argument("--workers", type=int, default=4, help="抓取并行数")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    entries = prepare(args)
+    atlantic_rss_reader.FETCH_WORKERS = args.workers
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        os.makedirs(atlantic_rss_reader.ARTICLES_DIR)
+        # 隔离状态文件，并关闭综述缓存命中（每次运行使用新的缓存目录）
+        article_store.ARTICLE_STORE_DB = os.path.join(workdir, 'articles.db')
+        seen_index.SEEN_INDEX_DB = os.path.join(workdir, 'seen.db')
+        try:
+            print(f"文章 {len(entries)} 篇，下载延迟 {args.fetch_latency:g} 秒，Gemini 延迟 {args.gemini_latency:g}+{args.gemini_per_article:g}×篇数 秒，"
+                  f"抓取并行数 {args.workers}")
+            gemini_summarizer.SUMMARY_CACHE_DIR = os.path.join(workdir, 'cache-sequential')
+            start = time.perf_counter()
+            sequential = run_sequential(entries, args.workers, '20250408')
+            print(f"顺序执行: {time.perf_counter() - start:6.2f} 秒")
+
+            gemini_summarizer.SUMMARY_CACHE_DIR = os.path.join(workdir, 'cache-pipelined')
+            start = time.perf_counter()
+            pipelined, report = run_pipelined(entries, '20250408', os.path.join(workdir, 'runs'))
+            print(f"流水线:   {time.perf_counter() - start:6.2f} 秒")
+        finally:
+            os.chdir(cwd)
+
+    print(f"{'阶段':<10}{'处理数':>6}{'吞吐量/秒':>10}{'工作':>9}{'等待输入':>9}{'等待下游':>9}")
+    for name, stage in report['stages'].items():
+        print(f"{name:<10}{stage['items']:>6}{stage['throughput'] or 0:>12.2f}{stage['busy']:>10.2f}"
+              f"{stage['idle']:>10.2f}{stage['blocked']:>10.2f}")
+
+    same = [line for line in sequential.split('\n') if line.startswith('## ')] == \
+        [line for line in pipelined.split('\n') if line.startswith('## ')]
+    print("两种方式的综述文章顺序一致" if same else "综述文章顺序不一致")
+    return 0 if same else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""GitHub 同步路径的基准测试（使用本地模拟的 GitHub API，无需网络）
+
+在临时目录中准备 feed.xml、articles/、dailybrief/ 和合成的归档页，依次测量：
+首次同步、无变化同步、少量文件变化、分支冲突后的自动重试、单文件 Contents API 同步，
+以及离线期间多次同步请求在队列中合并为一次提交。
+
+用法: python benchmarks/bench_sync.py [--archive-pages 50] [--latency 0.02]
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import fake_github  # noqa: E402
+import github_sync  # noqa: E402
+import sync_outbox  # noqa: E402
+from retry_policy import RetryPolicy  # noqa: E402
+
+
+def prepare_workdir(workdir, archive_pages):
+    """复制仓库中的数据文件，并合成归档页"""
+    for name in ('articles', 'dailybrief'):
+        shutil.copytree(os.path.join(ROOT, name), os.path.join(workdir, name))
+    shutil.copy(os.path.join(ROOT, 'feed.xml'), os.path.join(workdir, 'feed.xml'))
+    os.makedirs(os.path.join(workdir, 'archive'))
+    with open(os.path.join(ROOT, 'feed.xml'), 'r', encoding='utf-8') as f:
+        feed = f.read()
+    for index in range(1, archive_pages + 1):
+        with open(os.path.join(workdir, 'archive', f'feed-{index}.xml'), 'w', encoding='utf-8') as f:
+            f.write(feed.replace('<channel>', f'<channel><!-- archive {index} -->', 1))
+
+
+def configure(server):
+    github_sync.GITHUB_API_URL = server.url
+    github_sync.GIT_TOKEN = 'bench-token'
+    github_sync.GIT_REPO_URL = server.repo_url
+    github_sync.OWNER, github_sync.REPO = server.owner, server.repo
+
+
+def touch(path, marker):
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(f"\n<!-- {marker} -->\n")
+
+
+def measure(server, label, func):
+    server.reset_requests()
+    commits_before = len(server.repository.commits)
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} 结果={str(result):<5} 请求数={len(server.requests):>3} "
+          f"新提交={len(server.repository.commits) - commits_before:>2} 耗时={elapsed * 1000:8.1f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GitHub 同步基准测试")
+    parser.add_argument("--archive-pages", type=int, default=50, help="合成的归档页数量")
+    parser.add_argument("--latency", type=float, default=0.02, help="模拟的每个请求延迟（秒）")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    failures = 0
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir, fake_github.FakeGitHub(latency=args.latency) as server:
+        prepare_workdir(workdir, args.archive_pages)
+        os.chdir(workdir)
+        configure(server)
+        try:
+            files = github_sync.collect_sync_files()
+            print(f"同步文件数: {len(files)}，模拟请求延迟 {args.latency * 1000:.0f} ms")
+
+            measure(server, "首次同步（全部文件）", github_sync.sync_to_github)
+            measure(server, "无变化", github_sync.sync_to_github)
+
+            touch('feed.xml', 'update')
+            touch(os.path.join('dailybrief', '20250408.md'), 'update')
+            measure(server, "2 个文件变化", github_sync.sync_to_github)
+
+            touch('feed.xml', 'conflict')
+            server.conflict_next = 1
+            measure(server, "分支冲突后重试", github_sync.sync_to_github)
+            if 'CONFLICT.txt' not in server.repository.files():
+                print("  冲突提交丢失")
+                failures += 1
+
+            measure(server, "Contents API 单文件（无变化）", github_sync.sync_feed_to_github)
+            touch('feed.xml', 'contents')
+            server.conflict_next = 1
+            measure(server, "Contents API 冲突后重试", github_sync.sync_feed_to_github)
+
+            # 离线期间的多次同步请求合并为一次提交
+            outbox = sync_outbox.SyncOutbox(path=os.path.join(workdir, 'state', 'sync_outbox.json'),
+                                            policy=RetryPolicy(base_delay=0.01, max_delay=0.01, deadline=None))
+            server.fail_next = 10 ** 6
+            for index in range(10):
+                touch('feed.xml', f'offline {index}')
+                outbox.enqueue(['feed.xml'])
+                outbox.flush(force=True)
+            pending = outbox.pending()
+            print(f"离线期间: 待同步任务合并了 {pending['coalesced'] + 1} 次请求，已失败 {pending['attempts']} 次")
+            server.fail_next = 0
+            measure(server, "恢复后执行队列", lambda: outbox.flush(force=True))
+
+            remote = server.repository.files()
+            for repo_path, local_path in github_sync.collect_sync_files().items():
+                with open(local_path, 'rb') as f:
+                    if remote.get(repo_path) != f.read():
+                        print(f"  远程内容不一致: {repo_path}")
+                        failures += 1
+        finally:
+            os.chdir(cwd)
+    print("远程内容与本地一致" if not failures else f"失败项: {failures}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
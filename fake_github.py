@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""本地模拟的 GitHub API，用于在无网络环境下测试和基准测试同步逻辑
+
+实现 github_sync 用到的接口子集：
+- Contents API: GET/PUT /repos/{owner}/{repo}/contents/{path}（SHA 不匹配时返回 409）
+- Git Data API: refs / commits / trees / blobs（更新 ref 不是快进时返回 422）
+
+用法:
+    python fake_github.py --port 8765
+    GITHUB_API_URL=http://127.0.0.1:8765 GIT_REPO_URL=https://github.com/owner/repo GIT_TOKEN=x python github_sync.py
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import posixpath
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+def blob_sha(content_bytes):
+    return hashlib.sha1(f"blob {len(content_bytes)}\0".encode('utf-8') + content_bytes).hexdigest()
+
+
+class FakeRepository:
+    """内存中的单仓库对象存储：blob、扁平文件树、提交和分支"""
+
+    def __init__(self, branch='main'):
+        self.blobs = {}
+        self.trees = {}
+        self.commits = {}
+        self.refs = {}
+        self.lock = threading.RLock()
+        self.refs[branch] = self.commit({}, [], "Initial commit")
+
+    def _sha(self, kind, payload):
+        return hashlib.sha1(f"{kind}:{payload}:{time.monotonic_ns()}".encode('utf-8')).hexdigest()
+
+    def add_blob(self, content_bytes):
+        sha = blob_sha(content_bytes)
+        self.blobs[sha] = content_bytes
+        return sha
+
+    def add_tree(self, entries):
+        sha = self._sha('tree', json.dumps(entries, sort_keys=True))
+        self.trees[sha] = dict(entries)
+        return sha
+
+    def commit(self, entries, parents, message):
+        sha = self._sha('commit', message)
+        self.commits[sha] = {'tree': self.add_tree(entries), 'parents': list(parents), 'message': message}
+        return sha
+
+    def head_files(self, branch='main'):
+        """返回分支最新提交中的 {路径: blob SHA}"""
+        with self.lock:
+            return dict(self.trees[self.commits[self.refs[branch]]['tree']])
+
+    def files(self, branch='main'):
+        """返回分支最新提交中的 {路径: 内容}"""
+        with self.lock:
+            return {path: self.blobs[sha] for path, sha in self.head_files(branch).items()}
+
+    def write_files(self, files, message="External commit", branch='main'):
+        """直接在分支上提交文件（模拟其他客户端的并发提交）"""
+        with self.lock:
+            entries = self.head_files(branch)
+            for path, content_bytes in files.items():
+                entries[path] = self.add_blob(content_bytes)
+            self.refs[branch] = self.commit(entries, [self.refs[branch]], message)
+            return self.refs[branch]
+
+    def is_ancestor(self, ancestor, commit_sha):
+        pending = [commit_sha]
+        seen = set()
+        while pending:
+            sha = pending.pop()
+            if sha == ancestor:
+                return True
+            if sha in seen or sha not in self.commits:
+                continue
+            seen.add(sha)
+            pending.extend(self.commits[sha]['parents'])
+        return False
+
+
+class FakeGitHub:
+    """在后台线程中运行的模拟 GitHub API 服务器"""
+
+    def __init__(self, owner='owner', repo='repo', token=None, branch='main', host='127.0.0.1', port=0, latency=0.0):
+        self.owner = owner
+        self.repo = repo
+        self.token = token
+        self.branch = branch
+        self.latency = latency
+        self.repository = FakeRepository(branch)
+        self.requests = []
+        # 故障注入：接下来若干个请求直接返回指定状态码
+        self.fail_next = 0
+        self.fail_status = 503
+        # 冲突注入：下一次更新 ref / PUT 文件前先插入一个外部提交
+        self.conflict_next = 0
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def repo_url(self):
+        """供 GIT_REPO_URL 使用的仓库地址"""
+        return f"https://github.com/{self.owner}/{self.repo}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset_requests(self):
+        self.requests.clear()
+
+    def _inject_conflict(self, path='CONFLICT.txt'):
+        if self.conflict_next > 0:
+            self.conflict_next -= 1
+            self.repository.write_files({path: f"external {time.time()}".encode('utf-8')}, branch=self.branch)
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, data=None):
+                body = json.dumps(data if data is not None else {}).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _body(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                return json.loads(self.rfile.read(length) or b'{}')
+
+            def _dispatch(self, method):
+                parts = urlsplit(self.path)
+                fake.requests.append((method, parts.path))
+                if fake.latency:
+                    time.sleep(fake.latency)
+                if fake.fail_next > 0:
+                    fake.fail_next -= 1
+                    return self._send(fake.fail_status, {'message': 'Injected failure'})
+                if fake.token and self.headers.get('Authorization') != f"token {fake.token}":
+                    return self._send(401, {'message': 'Bad credentials'})
+                prefix = f"/repos/{fake.owner}/{fake.repo}/"
+                if not parts.path.startswith(prefix):
+                    return self._send(404, {'message': 'Not Found'})
+                path = parts.path[len(prefix):]
+                query = parse_qs(parts.query)
+                with fake.repository.lock:
+                    if path.startswith('contents'):
+                        return self._contents(method, path[len('contents'):].strip('/'), query)
+                    if path.startswith('git/'):
+                        return self._git(method, path[len('git/'):], query)
+                return self._send(404, {'message': 'Not Found'})
+
+            def do_GET(self):
+                self._dispatch('GET')
+
+            def do_PUT(self):
+                self._dispatch('PUT')
+
+            def do_POST(self):
+                self._dispatch('POST')
+
+            def do_PATCH(self):
+                self._dispatch('PATCH')
+
+            def _contents(self, method, path, query):
+                repository = fake.repository
+                branch = (query.get('ref') or [fake.branch])[0]
+                files = repository.head_files(branch)
+                if method == 'GET':
+                    if path in files:
+                        content_bytes = repository.blobs[files[path]]
+                        return self._send(200, {
+                            'type': 'file', 'name': posixpath.basename(path), 'path': path, 'sha': files[path],
+                            'size': len(content_bytes), 'encoding': 'base64', 'download_url': None,
+                            'content': base64.b64encode(content_bytes).decode('utf-8'),
+                        })
+                    prefix = path + '/' if path else ''
+                    listing = {}
+                    for file_path, sha in files.items():
+                        if not file_path.startswith(prefix):
+                            continue
+                        name, _, rest = file_path[len(prefix):].partition('/')
+                        if rest:
+                            listing.setdefault(name, {'type': 'dir', 'name': name, 'path': prefix + name, 'sha': None})
+                        else:
+                            listing[name] = {'type': 'file', 'name': name, 'path': file_path, 'sha': sha,
+                                             'size': len(repository.blobs[sha])}
+                    if not listing and path:
+                        return self._send(404, {'message': 'Not Found'})
+                    return self._send(200, sorted(listing.values(), key=lambda item: item['name']))
+                if method == 'PUT':
+                    data = self._body()
+                    branch = data.get('branch') or fake.branch
+                    fake._inject_conflict(path)
+                    files = repository.head_files(branch)
+                    current = files.get(path)
+                    if current is not None and not data.get('sha'):
+                        return self._send(422, {'message': '"sha" wasn\'t supplied.'})
+                    if current is not None and data['sha'] != current:
+                        return self._send(409, {'message': f"{path} does not match {data['sha']}"})
+                    content_bytes = base64.b64decode(data['content'])
+                    commit_sha = repository.write_files({path: content_bytes}, data.get('message', ''), branch)
+                    return self._send(201 if current is None else 200, {
+                        'content': {'path': path, 'sha': blob_sha(content_bytes)},
+                        'commit': {'sha': commit_sha},
+                    })
+                return self._send(405, {'message': 'Method Not Allowed'})
+
+            def _git(self, method, path, query):
+                repository = fake.repository
+                if method == 'GET' and path.startswith('ref/heads/'):
+                    branch = path[len('ref/heads/'):]
+                    if branch not in repository.refs:
+                        return self._send(404, {'message': 'Not Found'})
+                    return self._send(200, {'ref': f"refs/heads/{branch}",
+                                            'object': {'type': 'commit', 'sha': repository.refs[branch]}})
+                if method == 'GET' and path.startswith('commits/'):
+                    commit = repository.commits.get(path[len('commits/'):])
+                    if commit is None:
+                        return self._send(404, {'message': 'Not Found'})
+                    return self._send(200, {'sha': path[len('commits/'):], 'message': commit['message'],
+                                            'tree': {'sha': commit['tree']},
+                                            'parents': [{'sha': sha} for sha in commit['parents']]})
+                if method == 'GET' and path.startswith('trees/'):
+                    tree = repository.trees.get(path[len('trees/'):])
+                    if tree is None:
+                        return self._send(404, {'message': 'Not Found'})
+                    return self._send(200, {'sha': path[len('trees/'):], 'truncated': False, 'tree': [
+                        {'path': file_path, 'mode': '100644', 'type': 'blob', 'sha': sha,
+                         'size': len(repository.blobs[sha])}
+                        for file_path, sha in sorted(tree.items())
+                    ]})
+                if method == 'POST' and path == 'blobs':
+                    data = self._body()
+                    content = data['content']
+                    content_bytes = base64.b64decode(content) if data.get('encoding') == 'base64' else content.encode('utf-8')
+                    return self._send(201, {'sha': repository.add_blob(content_bytes)})
+                if method == 'POST' and path == 'trees':
+                    data = self._body()
+                    entries = dict(repository.trees.get(data.get('base_tree'), {}))
+                    for item in data.get('tree', []):
+                        if 'content' in item:
+                            entries[item['path']] = repository.add_blob(item['content'].encode('utf-8'))
+                        elif item.get('sha') is None:
+                            entries.pop(item['path'], None)
+                        else:
+                            entries[item['path']] = item['sha']
+                    sha = repository.add_tree(entries)
+                    return self._send(201, {'sha': sha})
+                if method == 'POST' and path == 'commits':
+                    data = self._body()
+                    if data.get('tree') not in repository.trees:
+                        return self._send(422, {'message': 'Tree SHA does not exist'})
+                    sha = repository._sha('commit', data.get('message', ''))
+                    repository.commits[sha] = {'tree': data['tree'], 'parents': list(data.get('parents', [])),
+                                               'message': data.get('message', '')}
+                    return self._send(201, {'sha': sha})
+                if method == 'PATCH' and path.startswith('refs/heads/'):
+                    branch = path[len('refs/heads/'):]
+                    data = self._body()
+                    fake._inject_conflict()
+                    if branch not in repository.refs or data.get('sha') not in repository.commits:
+                        return self._send(422, {'message': 'Reference does not exist'})
+                    if not data.get('force') and not repository.is_ancestor(repository.refs[branch], data['sha']):
+                        return self._send(422, {'message': 'Update is not a fast forward'})
+                    repository.refs[branch] = data['sha']
+                    return self._send(200, {'ref': f"refs/heads/{branch}",
+                                            'object': {'type': 'commit', 'sha': data['sha']}})
+                return self._send(404, {'message': 'Not Found'})
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟的 GitHub API 服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--owner", default="owner")
+    parser.add_argument("--repo", default="repo")
+    parser.add_argument("--token", help="要求请求携带的令牌，未设置时不校验")
+    args = parser.parse_args()
+
+    server = FakeGitHub(args.owner, args.repo, token=args.token, host=args.host, port=args.port)
+    print(f"模拟 GitHub API: {server.url} (仓库 {server.repo_url})")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import datetime
+import gzip
+import hashlib
+import os
+import threading
+import time
+
+# brotli 为可选依赖，未安装时只提供gzip压缩版本
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 检查feed文件是否被其他进程更新的最小间隔（秒）
+FEED_CACHE_CHECK_INTERVAL = float(os.environ.get("FEED_CACHE_CHECK_INTERVAL", "1"))
+
+# 预压缩版本的文件后缀，按优先级排列
+COMPRESSED_SUFFIXES = {
+    'br': '.br',
+    'gzip': '.gz',
+}
+
+
+def available_encodings():
+    """返回当前环境支持的压缩编码"""
+    return [encoding for encoding in COMPRESSED_SUFFIXES if encoding != 'br' or brotli is not None]
+
+
+def compress(body, encoding):
+    """按指定编码压缩内容，结果与时间无关以保证可复现"""
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=9, mtime=0)
+    if encoding == 'br':
+        return brotli.compress(body, quality=11)
+    raise ValueError(f"不支持的压缩编码: {encoding}")
+
+
+def write_compressed_variants(path):
+    """为文件生成预压缩版本（如 feed.xml.gz / feed.xml.br），返回写入的文件列表"""
+    with open(path, 'rb') as f:
+        body = f.read()
+    written = []
+    for encoding in available_encodings():
+        variant_path = path + COMPRESSED_SUFFIXES[encoding]
+        tmp_path = variant_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(compress(body, encoding))
+        os.replace(tmp_path, variant_path)
+        written.append(variant_path)
+    return written
+
+
+def file_signature(path):
+    """文件的 (inode, 大小, 修改时间)，用于判断文件是否被替换或修改；文件不存在时返回None"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+def choose_encoding(accept_encodings, encodings):
+    """根据 Accept-Encoding 选择压缩编码，均不可接受时返回None（不压缩）"""
+    best, best_quality = None, 0
+    for encoding in encodings:
+        quality = accept_encodings.quality(encoding)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class CachedFeed:
+    """内存中的feed内容、预压缩版本及其校验信息"""
+
+    def __init__(self, body, last_modified, variants=None, signature=None):
+        self.body = body
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self.last_modified = last_modified
+        self.variants = variants or {}
+        self.signature = signature
+
+    def representation(self, encoding):
+        """返回指定编码的(内容, ETag)，encoding为None时返回原始内容"""
+        if encoding is None:
+            return self.body, self.etag
+        # 不同编码是不同的表示，需要不同的强ETag
+        return self.variants[encoding], f"{self.etag}-{encoding}"
+
+
+class FeedCache:
+    """将feed文件缓存在内存中
+
+    本进程重新生成文件时通过 invalidate() 立即失效；其他进程（如 worker.py）更新文件时，
+    通过定期比较文件的 inode/大小/修改时间发现变化并重新加载。
+    """
+
+    def __init__(self, path, check_interval=None):
+        self.path = path
+        self.check_interval = FEED_CACHE_CHECK_INTERVAL if check_interval is None else check_interval
+        self._feed = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """使缓存失效，下次访问时重新从磁盘读取"""
+        with self._lock:
+            self._feed = None
+
+    def get(self):
+        """返回缓存的feed，未缓存时从磁盘加载；文件不存在时返回None"""
+        feed = self._feed
+        if feed is not None and not self._changed_on_disk(feed):
+            return feed
+        with self._lock:
+            # 其他线程可能已经重新加载过
+            if self._feed is None or self._feed is feed:
+                self._feed = self._load()
+            return self._feed
+
+    def _changed_on_disk(self, feed):
+        """距上次检查超过 check_interval 时比较文件状态，文件已变化时返回True"""
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return False
+        self._checked_at = now
+        return file_signature(self.path) != feed.signature
+
+    def _load(self):
+        # 先取文件状态再读取，读取期间文件被替换时下次检查会再次加载
+        signature = file_signature(self.path)
+        try:
+            with open(self.path, 'rb') as f:
+                body = f.read()
+            mtime = os.path.getmtime(self.path)
+        except OSError as e:
+            print(f"读取{self.path}失败: {str(e)}")
+            return None
+        last_modified = datetime.datetime.fromtimestamp(int(mtime), tz=datetime.timezone.utc)
+        return CachedFeed(body, last_modified, self._load_variants(body, mtime), signature)
+
+    def _load_variants(self, body, mtime):
+        """读取预压缩文件；缺失或比feed旧时在加载时压缩一次，请求时不再压缩"""
+        variants = {}
+        for encoding in available_encodings():
+            variant_path = self.path + COMPRESSED_SUFFIXES[encoding]
+            try:
+                if os.path.getmtime(variant_path) >= mtime:
+                    with open(variant_path, 'rb') as f:
+                        variants[encoding] = f.read()
+                    continue
+            except OSError:
+                pass
+            variants[encoding] = compress(body, encoding)
+        return variants
@@ -9,7 +9,17 @@ import requests
 import logging
 import sys
 import argparse
+import re
+import hashlib
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
 import time # 新增导入 time 模块
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+import http_client
+import article_store
+import rss_generator
+from rate_limiter import TokenBucket
+from retry_policy import RetryPolicy, CircuitBreaker
 
 # 设置日志
 log_format = '%(asctime)s [%(name)s] %(levelname)s: %(message)s'
@@ -39,6 +49,51 @@ DEFAULT_MODEL = "gemini-2.5-pro-exp-03-25"
 GEMINI_MODEL = os.environ.get("GEMINI_MODEL", DEFAULT_MODEL)
 GEMINI_API_URL = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:generateContent"
 
+# Gemini调用的重试策略：指数退避+全抖动，遵循Retry-After，并限制总耗时
+RETRY_POLICY = RetryPolicy(
+    max_attempts=int(os.environ.get("GEMINI_MAX_RETRIES", "5")),
+    base_delay=float(os.environ.get("GEMINI_RETRY_BASE_DELAY", "5")),
+    max_delay=float(os.environ.get("GEMINI_RETRY_MAX_DELAY", "120")),
+    deadline=float(os.environ.get("GEMINI_RETRY_DEADLINE", "900")),
+)
+# 连续失败达到阈值后熔断，冷却期内不再请求；每个模型单独熔断
+GEMINI_BREAKER_THRESHOLD = int(os.environ.get("GEMINI_BREAKER_THRESHOLD", "5"))
+GEMINI_BREAKER_COOLDOWN = float(os.environ.get("GEMINI_BREAKER_COOLDOWN", "300"))
+_circuit_breakers = {}
+
+# 模型回退链，格式 "模型:等待秒数,模型:等待秒数"；主模型在等待时间内未返回时，
+# 向下一个模型发出对冲请求，先成功返回的结果胜出。未设置时只使用 GEMINI_MODEL
+GEMINI_MODELS = os.environ.get("GEMINI_MODELS", "")
+# 模型未指定等待秒数时的默认对冲等待时间
+GEMINI_HEDGE_AFTER = float(os.environ.get("GEMINI_HEDGE_AFTER", "180"))
+
+# 全局每分钟请求配额（所有模型、所有线程共享），0 表示不限速
+GEMINI_RPM = float(os.environ.get("GEMINI_RPM", "0"))
+_request_limiter = TokenBucket(GEMINI_RPM / 60.0) if GEMINI_RPM > 0 else None
+# 批量补生成简报时并行处理的日期数
+GEMINI_BACKFILL_WORKERS = int(os.environ.get("GEMINI_BACKFILL_WORKERS", "2"))
+
+# 单次请求的输入token预算，超出时按文章顺序分批并行生成综述后再合并
+GEMINI_CHUNK_TOKENS = int(os.environ.get("GEMINI_CHUNK_TOKENS", "60000"))
+# 分批生成综述时的最大并行请求数
+GEMINI_MAX_WORKERS = int(os.environ.get("GEMINI_MAX_WORKERS", "3"))
+# 流水线中每批最多的文章数：攒满即提交，使前面的文章在后面的文章下载时就开始生成综述
+GEMINI_PIPELINE_BATCH_ARTICLES = int(os.environ.get("GEMINI_PIPELINE_BATCH_ARTICLES", "8"))
+
+# 是否使用 streamGenerateContent 流式接收综述，边接收边写入临时文件
+GEMINI_STREAM = os.environ.get("GEMINI_STREAM", "").lower() in ("1", "true", "yes")
+
+# 单篇文章综述的缓存目录，键为文章内容、提示词和模型的哈希
+SUMMARY_CACHE_DIR = os.environ.get("SUMMARY_CACHE_DIR", "cache/summaries")
+
+# 文章输入编码：compact 为去除样板内容的精简分隔格式，json 为原始JSON列表
+GEMINI_INPUT_FORMAT = os.environ.get("GEMINI_INPUT_FORMAT", "compact")
+# 正文开头由抓取模块插入的 "作者: xxx | 发布时间: xxx" 行
+BYLINE_PATTERN = re.compile(r'^作者:\s*(.*?)\s*\|\s*发布时间:\s*(.*?)\s*$')
+
+# 中日韩字符大致每个字符一个token，其余字符约4个字符一个token
+CJK_PATTERN = re.compile(r'[\u3000-\u9fff\uf900-\ufaff\uff00-\uffef]')
+
 
 def ensure_dir_exists(directory):
     """确保目录存在，如果不存在则创建"""
@@ -76,14 +131,91 @@ DEFAULT_PROMPT = """你是一位资深新闻编辑，请对这份The Atlantic的
 3. 适当保留原文的叙事结构和重要细节"""
 
 
+def _finish_article(article, body):
+    """一次性拼接正文行，去掉首尾空行和文章之间的 --- 分隔线"""
+    if body is not None:
+        start, end = 0, len(body)
+        while start < end and not body[start].strip():
+            start += 1
+        while end > start and (not body[end - 1].strip() or body[end - 1].strip() == '---'):
+            end -= 1
+        article['content'] = '\n'.join(body[start:end]) + '\n' if end > start else ''
+    return article
+
+
+def iter_articles(lines):
+    """从文章文件的行迭代器中逐篇解析文章（单遍、线性时间）
+
+    lines 可以是打开的文件对象或任意字符串行迭代器，正文按行收集后一次性拼接，保留正文中的空行。
+    """
+    article = None
+    body = None
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if line.startswith('## '):
+            # 新文章开始，输出上一篇
+            if article is not None:
+                yield _finish_article(article, body)
+            article = {'title': line[3:].strip()}
+            body = None
+        elif body is not None:
+            body.append(line)
+        elif article is None:
+            # 文件标题等第一篇文章之前的内容
+            continue
+        elif line.startswith('*发布时间:'):
+            article['publish_time'] = line[6:].strip().rstrip('*').strip()
+        elif line.startswith('[原文链接]'):
+            article['url'] = line[line.find('(')+1:line.find(')')]
+        elif line.startswith('### 正文'):
+            body = []
+    if article is not None:
+        yield _finish_article(article, body)
+
+
+def iter_article_file(filepath):
+    """逐行流式读取文章文件并逐篇返回文章"""
+    with open(filepath, "r", encoding="utf-8") as f:
+        yield from iter_articles(f)
+
+
+def article_from_record(record):
+    """将文章存储中的记录转换为综述使用的文章字典（与Markdown解析结果一致）"""
+    article = {'title': record['title'], 'publish_time': record['published'], 'url': record['url']}
+    body = (record.get('body') or '').strip('\n')
+    if body:
+        article['content'] = body + '\n'
+    return article
+
+
+def load_stored_articles(date_str):
+    """从结构化文章存储中读取某一天的文章，存储不存在或没有该日期时返回None"""
+    if not os.path.exists(article_store.ARTICLE_STORE_DB):
+        return None
+    store = article_store.ArticleStore()
+    try:
+        records = store.load_day(date_str)
+    finally:
+        store.close()
+    return [article_from_record(record) for record in records] or None
+
+
 def load_articles(date_str=None):
-    """加载指定日期的文章，如果未指定日期则加载最新的文章"""
+    """加载指定日期的文章，如果未指定日期则加载最新的文章
+
+    优先读取结构化文章存储，没有记录时回退到解析 articles/<日期>.md。
+    """
     try:
         # 如果未指定日期，使用当前美东时间的日期
         if not date_str:
             now = get_beijing_time()
             date_str = now.strftime("%Y%m%d")
         
+        articles = load_stored_articles(date_str)
+        if articles:
+            logger.info(f"从文章存储加载了 {len(articles)} 篇文章，日期: {date_str}")
+            return articles
+        
         # 构建文件路径
         filepath = os.path.join(ARTICLES_DIR, f"{date_str}.md")
         
@@ -92,34 +224,8 @@ def load_articles(date_str=None):
             logger.error(f"文件不存在: {filepath}")
             return None
         
-        # 加载并解析markdown文件
-        with open(filepath, "r", encoding="utf-8") as f:
-            content = f.read()
-            
-        # 解析文章内容
-        articles = []
-        current_article = {}
-        lines = content.split('\n')
-        
-        for line in lines:
-            if line.startswith('## '):
-                # 如果已有文章，保存它
-                if current_article:
-                    articles.append(current_article)
-                # 开始新文章
-                current_article = {'title': line[3:].strip()}
-            elif line.startswith('*发布时间:'):
-                current_article['publish_time'] = line[6:].strip()
-            elif line.startswith('[原文链接]'):
-                current_article['url'] = line[line.find('(')+1:line.find(')')]
-            elif line.startswith('### 正文'):
-                current_article['content'] = ''
-            elif 'content' in current_article and line:
-                current_article['content'] += line + '\n'
-        
-        # 添加最后一篇文章
-        if current_article:
-            articles.append(current_article)
+        # 单遍流式解析markdown文件
+        articles = list(iter_article_file(filepath))
             
         logger.info(f"从 {filepath} 加载了 {len(articles)} 篇文章")
         return articles
@@ -128,10 +234,121 @@ def load_articles(date_str=None):
         return None
 
 
-def call_gemini_api(api_key=None, prompt=None, articles=None):
-    """调用Gemini API生成摘要"""
-    max_retries = 5
-    retry_delay = 120  # 2分钟，单位秒
+def strip_tracking_params(url):
+    """去掉URL中的 utm_* 跟踪参数"""
+    if not url:
+        return url
+    parts = urlsplit(url)
+    query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+             if not key.lower().startswith('utm_')]
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), parts.fragment))
+
+
+def encode_article(article, index):
+    """将单篇文章编码为精简的分隔文本，去掉正文中重复的标题和作者/时间样板行"""
+    title = article.get('title', '').strip()
+    publish_time = article.get('publish_time', '').strip('* ')
+    author = ''
+    body_lines = []
+    for line in article.get('content', '').split('\n'):
+        stripped = line.strip()
+        if not body_lines and stripped.startswith('# ') and stripped[2:].strip() == title:
+            continue
+        match = BYLINE_PATTERN.match(stripped)
+        if match and not body_lines:
+            author = match.group(1)
+            # 抓取时的可读发布时间比Feed中的ISO时间更适合直接写入综述
+            publish_time = match.group(2) or publish_time
+            continue
+        if stripped or (body_lines and body_lines[-1]):
+            body_lines.append(stripped)
+    header = [f"[{index}] {title}", f"时间: {publish_time}"]
+    if author:
+        header.append(f"作者: {author}")
+    header.append(f"链接: {strip_tracking_params(article.get('url', ''))}")
+    return '\n'.join(header + body_lines).strip()
+
+
+def encode_articles(articles):
+    """将文章列表编码为请求文本，并记录编码前后的token估算"""
+    if GEMINI_INPUT_FORMAT == 'json':
+        return json.dumps(articles, ensure_ascii=False)
+    encoded = "以下为文章列表，每篇以 [序号] 标题 开头：\n\n" + '\n\n'.join(
+        encode_article(article, index) for index, article in enumerate(articles, 1))
+    before = estimate_tokens(json.dumps(articles, ensure_ascii=False))
+    after = estimate_tokens(encoded)
+    logger.info(f"文章输入编码: 约 {before} tokens -> {after} tokens (减少 {before - after})")
+    return encoded
+
+
+def extract_response_text(result):
+    """从Gemini响应（或流式响应的一个分片）中提取文本，没有文本时返回None"""
+    candidates = result.get("candidates") or []
+    if not candidates:
+        return None
+    parts = candidates[0].get("content", {}).get("parts") or []
+    texts = [part["text"] for part in parts if "text" in part]
+    return ''.join(texts) if texts else None
+
+
+def stream_attempt_path(stream_path, attempt):
+    """第attempt次尝试（从0开始）流式接收的文件路径，重试不会覆盖之前已接收的部分"""
+    return stream_path if attempt == 0 else f"{stream_path}.retry{attempt}"
+
+
+def read_gemini_stream(response, stream_path, started, stats, cancel=None):
+    """读取 streamGenerateContent 的SSE流，边接收边写入 stream_path，返回完整文本
+
+    连接中断时已写入的部分保留在 stream_path 中；cancel 被设置时关闭连接、删除该文件并返回None。
+    """
+    texts = []
+    with open(stream_path, "w", encoding="utf-8") as f:
+        for line in response.iter_lines(decode_unicode=True):
+            if cancel is not None and cancel.is_set():
+                response.close()
+                f.close()
+                try:
+                    os.remove(stream_path)
+                except OSError:
+                    # 调用方可能已经删除了落败请求的临时文件
+                    pass
+                return None
+            if not line or not line.startswith("data:"):
+                continue
+            text = extract_response_text(json.loads(line[5:].strip()))
+            if not text:
+                continue
+            if not texts:
+                stats["ttft"] = time.monotonic() - started
+                logger.info(f"收到首个流式分片，首字耗时 {stats['ttft']:.2f} 秒")
+            texts.append(text)
+            f.write(text)
+            f.flush()
+    return ''.join(texts) if texts else None
+
+
+def get_circuit_breaker(model):
+    """获取模型对应的熔断器"""
+    breaker = _circuit_breakers.get(model)
+    if breaker is None:
+        breaker = _circuit_breakers.setdefault(
+            model, CircuitBreaker(GEMINI_BREAKER_THRESHOLD, GEMINI_BREAKER_COOLDOWN))
+    return breaker
+
+
+def call_gemini_api(api_key=None, prompt=None, articles=None, stream_path=None, stats=None,
+                    retry_policy=None, circuit_breaker=None, model=None, cancel=None):
+    """调用Gemini API生成摘要
+
+    提供 stream_path 时使用 streamGenerateContent 流式接收，文本增量写入该文件；
+    stats 字典会被填入模型、首字节耗时、总耗时等信息。
+    未指定 model / retry_policy / circuit_breaker 时使用模块级的默认配置。
+    cancel 为 threading.Event，被设置后不再重试、不再等待，并中止正在接收的流，返回None。
+    """
+    model = model or get_current_model()
+    policy = retry_policy or RETRY_POLICY
+    breaker = circuit_breaker or get_circuit_breaker(model)
+    stats = stats if stats is not None else {}
 
     # 如果未提供API密钥，从环境变量获取
     if api_key is None:
@@ -140,92 +357,588 @@ def call_gemini_api(api_key=None, prompt=None, articles=None):
             logger.error("未提供API密钥且环境变量GEMINI_API_KEY未设置")
             return None
 
-    for attempt in range(max_retries):
-        try:
-            # 构建请求数据
-            # 修改API请求参数
-            request_data = {
-                "contents": [
-                    {
-                        "parts": [
-                            {"text": prompt},
-                            {"text": json.dumps(articles, ensure_ascii=False)}
-                        ]
-                    }
-                ],
-                "generationConfig": {
-                    "temperature": 0.7,  # 降低温度以获得更稳定的输出
-                    "topK": 40,
-                    "topP": 0.95,
-                    "maxOutputTokens": 100000
-                }
-            }
-            
-            # 发送请求
-            headers = {
-                "Content-Type": "application/json",
-                "x-goog-api-key": api_key
+    # 构建请求数据
+    request_data = {
+        "contents": [
+            {
+                "parts": [
+                    {"text": prompt},
+                    {"text": encode_articles(articles)}
+                ]
             }
-            
-            # 获取当前的API URL（可能已被环境变量更新）
-            current_api_url = f"https://generativelanguage.googleapis.com/v1beta/models/{os.environ.get('GEMINI_MODEL', GEMINI_MODEL)}:generateContent"
-            
-            logger.info(f"尝试调用Gemini API (第 {attempt + 1}/{max_retries} 次)")
-            response = requests.post(
+        ],
+        "generationConfig": {
+            "temperature": 0.7,  # 降低温度以获得更稳定的输出
+            "topK": 40,
+            "topP": 0.95,
+            "maxOutputTokens": 100000
+        }
+    }
+    headers = {
+        "Content-Type": "application/json",
+        "x-goog-api-key": api_key
+    }
+
+    if stream_path:
+        current_api_url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:streamGenerateContent?alt=sse"
+    else:
+        current_api_url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent"
+    stats["model"] = model
+
+    deadline = policy.start()
+    for attempt in range(policy.max_attempts):
+        if cancel is not None and cancel.is_set():
+            logger.info(f"Gemini API ({model}) 调用已取消")
+            stats["cancelled"] = True
+            return None
+        if not breaker.allow():
+            logger.error(f"Gemini API ({model}) 熔断器已打开，暂停调用")
+            return None
+        response = None
+        try:
+            logger.info(f"尝试调用Gemini API (第 {attempt + 1}/{policy.max_attempts} 次)")
+            stats["attempts"] = attempt + 1
+            if _request_limiter is not None:
+                waited = _request_limiter.acquire(cancel=cancel)
+                stats["rate_wait"] = stats.get("rate_wait", 0.0) + waited
+                if waited:
+                    logger.info(f"受每分钟请求配额限制，等待了 {waited:.1f} 秒")
+                if cancel is not None and cancel.is_set():
+                    stats["cancelled"] = True
+                    return None
+            started = time.monotonic()
+            # 使用共享会话复用连接，超时默认5分钟 (HTTP_TIMEOUT_GEMINI)
+            response = http_client.get_session('gemini').post(
                 current_api_url,
                 headers=headers,
                 json=request_data,
-                timeout=300  # 设置请求超时时间为5分钟
+                stream=bool(stream_path)
             )
+            stats["ttfb"] = time.monotonic() - started
+            logger.info(f"Gemini API响应头已返回，首字节耗时 {stats['ttfb']:.2f} 秒")
+            
+            if cancel is not None and cancel.is_set():
+                # 非流式请求无法中途中止，响应返回后直接丢弃
+                response.close()
+                stats["cancelled"] = True
+                return None
             
             # 检查响应
             if response.status_code == 200:
-                result = response.json()
-                if "candidates" in result and len(result["candidates"]) > 0:
-                    if "content" in result["candidates"][0] and "parts" in result["candidates"][0]["content"] and len(result["candidates"][0]["content"]["parts"]) > 0:
-                        text = result["candidates"][0]["content"]["parts"][0]["text"]
-                        logger.info("成功生成摘要")
-                        return text
-                    else:
-                        logger.error(f"API响应结构不符合预期: {result}")
+                if stream_path:
+                    attempt_path = stream_attempt_path(stream_path, attempt)
+                    stats["stream_path"] = attempt_path
+                    text = read_gemini_stream(response, attempt_path, started, stats, cancel)
+                    if text is None and cancel is not None and cancel.is_set():
+                        stats["cancelled"] = True
+                        return None
                 else:
-                    logger.error(f"API响应中没有找到候选结果: {result}")
-            else:
-                logger.error(f"API请求失败，状态码: {response.status_code}, 响应: {response.text}")
+                    result = response.json()
+                    text = extract_response_text(result)
+                breaker.record_success()
+                if text:
+                    stats["elapsed"] = time.monotonic() - started
+                    logger.info(f"成功生成摘要，耗时 {stats['elapsed']:.2f} 秒")
+                    return text
+                # 响应成功但没有文本（如被安全策略拦截），重试通常无济于事
+                logger.error("API响应中没有找到候选结果或文本")
+                return None
             
-            # 如果不是最后一次尝试，并且状态码指示可以重试 (例如 5xx 服务器错误)
-            if attempt < max_retries - 1 and response.status_code >= 500:
-                logger.info(f"API调用失败，将在 {retry_delay} 秒后重试...")
-                time.sleep(retry_delay)
-            elif response.status_code < 500: # 对于客户端错误 (4xx)，通常不应重试
+            logger.error(f"API请求失败，状态码: {response.status_code}, 响应: {response.text}")
+            if not policy.is_retryable(response.status_code):
+                # 其他客户端错误 (4xx)，通常不应重试
                 logger.error("客户端错误，不进行重试。")
                 return None
+            breaker.record_failure()
 
         except requests.exceptions.RequestException as e:
             logger.error(f"调用Gemini API时发生网络或请求错误: {str(e)}")
-            if attempt < max_retries - 1:
-                logger.info(f"网络或请求错误，将在 {retry_delay} 秒后重试...")
-                time.sleep(retry_delay)
+            keep_partial(stream_path, attempt, stats)
+            breaker.record_failure()
         except Exception as e:
-            logger.error(f"调用Gemini API失败 (尝试 {attempt + 1}/{max_retries}): {str(e)}")
-            if attempt < max_retries - 1:
-                logger.info(f"将在 {retry_delay} 秒后重试...")
-                time.sleep(retry_delay)
-            else:
-                logger.error("已达到最大重试次数，API调用失败。")
+            logger.error(f"调用Gemini API失败 (尝试 {attempt + 1}/{policy.max_attempts}): {str(e)}")
+            keep_partial(stream_path, attempt, stats)
+        finally:
+            # 本次是半开状态下的探测且没有记录成功或失败时，归还探测名额
+            breaker.release()
+        
+        if attempt == policy.max_attempts - 1:
+            break
+        delay = policy.next_delay(attempt, response)
+        if not policy.within_deadline(deadline, delay):
+            logger.error(f"重试等待 {delay:.1f} 秒将超出总截止时间，停止重试。")
+            return None
+        logger.info(f"将在 {delay:.1f} 秒后重试...")
+        if cancel is not None:
+            if cancel.wait(delay):
+                logger.info(f"Gemini API ({model}) 调用已取消")
+                stats["cancelled"] = True
                 return None
+        else:
+            time.sleep(delay)
     
-    logger.error("所有重试尝试均失败。")
+    logger.error("已达到最大重试次数，API调用失败。")
+    if stats.get("partials"):
+        logger.error(f"各次尝试已接收的部分内容保留在: {', '.join(stats['partials'])}")
     return None
 
 
-def save_daily_brief(content, date_str=None):
-    """保存每日简报"""
+def keep_partial(stream_path, attempt, stats):
+    """流式接收中断时记录本次尝试已接收部分内容的文件，供调用方查看"""
+    if not stream_path:
+        return
+    path = stream_attempt_path(stream_path, attempt)
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        stats.setdefault("partials", []).append(path)
+        logger.info(f"已接收的部分内容保留在 {path}")
+
+
+def configure_retry(max_attempts=None, base_delay=None, max_delay=None, deadline=None):
+    """更新Gemini调用的默认重试策略，未提供的参数保持当前值"""
+    global RETRY_POLICY
+    RETRY_POLICY = RetryPolicy(
+        max_attempts=max_attempts if max_attempts is not None else RETRY_POLICY.max_attempts,
+        base_delay=base_delay if base_delay is not None else RETRY_POLICY.base_delay,
+        max_delay=max_delay if max_delay is not None else RETRY_POLICY.max_delay,
+        deadline=deadline if deadline is not None else RETRY_POLICY.deadline,
+    )
+    return RETRY_POLICY
+
+
+def configure_rate_limit(rpm=None):
+    """设置全局每分钟请求配额，rpm 为0时取消限速"""
+    global GEMINI_RPM, _request_limiter
+    if rpm is not None:
+        GEMINI_RPM = float(rpm)
+        _request_limiter = TokenBucket(GEMINI_RPM / 60.0) if GEMINI_RPM > 0 else None
+    return _request_limiter
+
+
+def estimate_tokens(text):
+    """粗略估算文本的token数"""
+    if not text:
+        return 0
+    cjk_count = len(CJK_PATTERN.findall(text))
+    return cjk_count + (len(text) - cjk_count + 3) // 4
+
+
+def estimate_article_tokens(article):
+    """估算单篇文章在请求中占用的token数"""
+    if GEMINI_INPUT_FORMAT == 'json':
+        return estimate_tokens(json.dumps(article, ensure_ascii=False))
+    return estimate_tokens(encode_article(article, 0))
+
+
+def pack_articles(articles, article_tokens, budget):
+    """按原顺序贪心装批：加入下一篇会超出budget时另起一批"""
+    chunks = []
+    current, current_tokens = [], 0
+    for article, tokens in zip(articles, article_tokens):
+        if current and current_tokens + tokens > budget:
+            chunks.append(current)
+            current, current_tokens = [], 0
+        current.append(article)
+        current_tokens += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def chunk_articles(articles, max_tokens=None):
+    """按token预算将文章按原顺序切分为多批，单篇超出预算的文章单独成批
+
+    先按预算贪心装批得到最少批数，再在不增加批数的前提下二分查找最小的单批上限，
+    使各批大小尽量接近 总token数/批数，便于并行。
+    """
+    max_tokens = max_tokens or GEMINI_CHUNK_TOKENS
+    article_tokens = [estimate_article_tokens(article) for article in articles]
+    chunks = pack_articles(articles, article_tokens, max_tokens)
+    if len(chunks) <= 1:
+        return chunks
+    # 批数不变时的最小单批上限落在 [均值, max_tokens] 之间
+    low = -(-sum(article_tokens) // len(chunks))
+    high = max_tokens
+    while low < high:
+        middle = (low + high) // 2
+        if len(pack_articles(articles, article_tokens, middle)) <= len(chunks):
+            high = middle
+        else:
+            low = middle + 1
+    return pack_articles(articles, article_tokens, high)
+
+
+def format_brief_title(date_str=None):
+    """生成综述的一级标题"""
+    date = datetime.datetime.strptime(date_str, "%Y%m%d") if date_str else get_beijing_time()
+    return f"# The Atlantic 每日综述 - {date.strftime('%Y年%m月%d日')}"
+
+
+def strip_brief_title(text):
+    """去掉分批综述开头的一级标题，只保留各篇文章的综述"""
+    lines = text.strip().split('\n')
+    while lines and (not lines[0].strip() or lines[0].startswith('# ')):
+        lines.pop(0)
+    return '\n'.join(lines).strip()
+
+
+def merge_summaries(parts, date_str=None):
+    """合并各批综述为一篇，保持文章顺序并只保留一个标题"""
+    sections = [strip_brief_title(part) for part in parts]
+    return format_brief_title(date_str) + '\n\n' + '\n\n'.join(section for section in sections if section) + '\n'
+
+
+def get_current_model():
+    """获取当前使用的模型名称（可能已被命令行参数通过环境变量更新）"""
+    return os.environ.get('GEMINI_MODEL', GEMINI_MODEL)
+
+
+def get_model_chain():
+    """返回模型回退链 [(模型, 对冲等待秒数), ...]，第一个为主模型"""
+    spec = os.environ.get('GEMINI_MODELS', GEMINI_MODELS)
+    chain = []
+    for item in spec.split(','):
+        name, _, budget = item.strip().partition(':')
+        if name:
+            chain.append((name, float(budget) if budget else GEMINI_HEDGE_AFTER))
+    return chain or [(get_current_model(), GEMINI_HEDGE_AFTER)]
+
+
+def remove_stream_files(stream_path):
+    """删除一次调用流式接收的文件（含各次重试的 .retryN 文件）"""
+    directory, name = os.path.split(stream_path)
+    pattern = re.compile(re.escape(name) + r'(\.retry\d+)?$')
     try:
-        # 如果未指定日期，使用当前美东时间的日期
-        if not date_str:
-            now = get_beijing_time()
-            date_str = now.strftime("%Y%m%d")
+        names = os.listdir(directory or '.')
+    except OSError:
+        return
+    for entry in names:
+        if pattern.match(entry):
+            try:
+                os.remove(os.path.join(directory, entry))
+            except OSError:
+                pass
+
+
+def call_with_fallback(api_key=None, prompt=None, articles=None, stream_path=None, stats=None):
+    """按模型回退链调用Gemini：当前模型失败时立即改用下一个模型，
+    超过等待时间仍未返回时向下一个模型发出对冲请求，先成功的结果胜出
+
+    胜出后立即取消其余请求（不再重试，中止正在接收的流），并删除它们的流式临时文件。
+    """
+    chain = get_model_chain()
+    stats = stats if stats is not None else {}
+    if len(chain) == 1:
+        return call_gemini_api(api_key, prompt, articles, stream_path=stream_path, stats=stats, model=chain[0][0])
+    
+    started = time.monotonic()
+    # 每个请求的 (future, 模型, 统计, 流式文件路径, 发出原因)；原因为 primary、hedge 或 fallback
+    launched = []
+    cancel = threading.Event()
+    
+    def launch(index, reason):
+        model, budget = chain[index]
+        call_stats = {}
+        path = stream_path if index == 0 or not stream_path else f"{stream_path}.{index}"
+        future = Future()
+        
+        def run():
+            try:
+                future.set_result(call_gemini_api(api_key, prompt, articles, stream_path=path,
+                                                  stats=call_stats, model=model, cancel=cancel))
+            except Exception as e:
+                future.set_exception(e)
+        
+        # 使用守护线程而不是线程池：进程退出时不等待已落败的请求
+        threading.Thread(target=run, name=f"gemini-{model}", daemon=True).start()
+        launched.append((future, model, call_stats, path, reason))
+        if reason != 'primary':
+            logger.info(f"{'对冲' if reason == 'hedge' else '回退'}请求发往模型 {model}")
+        return budget
+    
+    def discard_losers(winner):
+        cancel.set()
+        if stream_path:
+            for future, _, _, path, _ in launched:
+                if future is not winner:
+                    remove_stream_files(path)
+    
+    budget = launch(0, 'primary')
+    pending = {launched[0][0]}
+    while pending:
+        done, pending = wait(pending, timeout=budget if len(launched) < len(chain) else None,
+                             return_when=FIRST_COMPLETED)
+        for future, model, call_stats, _, reason in launched:
+            if future in done and future.exception() is None and future.result():
+                discard_losers(future)
+                stats.update(call_stats)
+                stats["model"] = model
+                stats["hedged"] = reason == 'hedge'
+                stats["models_tried"] = [item[1] for item in launched]
+                stats["total_elapsed"] = time.monotonic() - started
+                logger.info(f"模型 {model} 的结果胜出，总耗时 {stats['total_elapsed']:.2f} 秒")
+                return future.result()
+        # 超时未返回时发出对冲请求，已失败时回退到下一个模型
+        if len(launched) < len(chain):
+            budget = launch(len(launched), 'fallback' if done else 'hedge')
+            pending.add(launched[-1][0])
+    logger.error("模型回退链中的所有模型均调用失败")
+    return None
+
+
+def load_cached_summary_for_models(article, prompt, models):
+    """按模型回退链顺序查找单篇综述缓存，返回(缓存键, 综述)；未命中时综述为None"""
+    for model in models:
+        key = summary_cache_key(article, prompt, model)
+        piece = load_cached_summary(key)
+        if piece is not None:
+            return key, piece
+    return None, None
+
+
+def summary_cache_key(article, prompt, model):
+    """单篇文章综述的缓存键：文章标题与正文、提示词、模型的哈希"""
+    digest = hashlib.sha256()
+    for part in (model, prompt, article.get('title', ''), article.get('content', '')):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def load_cached_summary(key):
+    """读取缓存的单篇综述，未命中时返回None"""
+    path = os.path.join(SUMMARY_CACHE_DIR, f"{key}.md")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def save_cached_summary(key, text):
+    """保存单篇综述到缓存"""
+    try:
+        ensure_dir_exists(SUMMARY_CACHE_DIR)
+        path = os.path.join(SUMMARY_CACHE_DIR, f"{key}.md")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"写入综述缓存失败: {str(e)}")
+
+
+def split_sections(text):
+    """将综述按二级标题拆分为单篇文章的综述"""
+    sections, current = [], []
+    for line in strip_brief_title(text).split('\n'):
+        if line.startswith('## ') and current:
+            sections.append('\n'.join(current).strip())
+            current = []
+        current.append(line)
+    if current and '\n'.join(current).strip():
+        sections.append('\n'.join(current).strip())
+    return sections
+
+
+def get_date_str(date_str=None):
+    """未指定日期时使用当前北京时间的日期"""
+    return date_str or get_beijing_time().strftime("%Y%m%d")
+
+
+def brief_part_path(date_str, index):
+    """流式接收时第index批综述的临时文件路径"""
+    suffix = "" if index == 0 else str(index)
+    return os.path.join(DAILYBRIEF_DIR, f"{get_date_str(date_str)}.md.part{suffix}")
+
+
+def remove_brief_parts(date_str):
+    """简报保存成功后删除流式接收的临时文件"""
+    prefix = f"{get_date_str(date_str)}.md.part"
+    if not os.path.isdir(DAILYBRIEF_DIR):
+        return
+    for name in os.listdir(DAILYBRIEF_DIR):
+        if name.startswith(prefix):
+            os.remove(os.path.join(DAILYBRIEF_DIR, name))
+
+
+def summarize_chunk(api_key, prompt, chunk, date_str=None, index=0, stats=None):
+    """为一批文章生成综述，启用流式接收时写入第index批的临时文件"""
+    stream_path = brief_part_path(date_str, index) if GEMINI_STREAM else None
+    return call_with_fallback(api_key, prompt, chunk, stream_path=stream_path, stats=stats)
+
+
+def batch_metadata(chunk, batch):
+    """单批综述的元数据：文章数以及使用的模型、耗时等统计"""
+    return {"articles": len(chunk), **{
+        name: round(value, 3) if isinstance(value, float) else value
+        for name, value in batch.items()}}
+
+
+def apply_chunk_summary(pieces, positions, articles, part, prompt, model):
+    """将一批综述按文章拆分填入pieces的对应位置，并写入单篇综述缓存"""
+    sections = split_sections(part)
+    if len(sections) == len(positions):
+        # 按实际生成综述的模型写入缓存
+        for position, section in zip(positions, sections):
+            pieces[position] = section
+            save_cached_summary(summary_cache_key(articles[position], prompt, model), section)
+    else:
+        # 无法与文章一一对应时整批放在该批第一篇文章的位置，不写入缓存
+        logger.warning(f"综述段落数({len(sections)})与文章数({len(positions)})不一致，本批不缓存")
+        pieces[positions[0]] = strip_brief_title(part)
+        for position in positions[1:]:
+            pieces[position] = ''
+
+
+def summarize_articles(api_key=None, prompt=None, articles=None, date_str=None, metadata=None):
+    """生成综述：先查单篇综述缓存，未命中的文章按token预算分批并行调用Gemini（map），再按原顺序合并（reduce）
+
+    metadata 字典会被填入文章数、缓存命中数以及每批使用的模型和耗时。
+    """
+    prompt = prompt or DEFAULT_PROMPT
+    metadata = metadata if metadata is not None else {}
+    models = [model for model, _ in get_model_chain()]
+    pieces = [load_cached_summary_for_models(article, prompt, models)[1] for article in articles]
+    
+    missing = [index for index, piece in enumerate(pieces) if piece is None]
+    logger.info(f"文章共 {len(articles)} 篇，综述缓存命中 {len(articles) - len(missing)} 篇")
+    metadata.update({"articles": len(articles), "cache_hits": len(articles) - len(missing), "batches": []})
+    if missing:
+        chunks = chunk_articles([articles[index] for index in missing])
+        workers = max(1, min(GEMINI_MAX_WORKERS, len(chunks)))
+        if len(chunks) > 1:
+            logger.info(f"待生成的文章按token预算分为 {len(chunks)} 批，并行数 {workers}")
+        if GEMINI_STREAM:
+            ensure_dir_exists(DAILYBRIEF_DIR)
+        
+        batch_stats = [{} for _ in chunks]
+        
+        def run_chunk(index):
+            return summarize_chunk(api_key, prompt, chunks[index], date_str, index, batch_stats[index])
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # executor.map 按提交顺序返回结果，保证合并后的文章顺序
+            parts = list(executor.map(run_chunk, range(len(chunks))))
+        
+        for chunk, batch in zip(chunks, batch_stats):
+            metadata["batches"].append(batch_metadata(chunk, batch))
+        
+        failed = [index + 1 for index, part in enumerate(parts) if not part]
+        if failed:
+            logger.error(f"第 {failed} 批综述生成失败")
+            return None
+        
+        positions = iter(missing)
+        for chunk, part, batch in zip(chunks, parts, batch_stats):
+            chunk_positions = [next(positions) for _ in chunk]
+            apply_chunk_summary(pieces, chunk_positions, articles, part, prompt, batch.get("model") or models[0])
+    
+    return merge_summaries(pieces, date_str)
+
+
+class StreamingSummarizer:
+    """边接收文章边生成综述：攒满一批（token预算或篇数上限）即提交给Gemini，全部完成后按原顺序合并
+
+    正在生成的批次达到并行上限时 add() 阻塞，向上游（抓取、抽取）施加背压。
+    """
+
+    def __init__(self, api_key=None, prompt=None, date_str=None, metadata=None,
+                 max_tokens=None, max_articles=None, max_workers=None):
+        self.api_key = api_key
+        self.prompt = prompt or DEFAULT_PROMPT
+        self.date_str = get_date_str(date_str)
+        self.metadata = metadata if metadata is not None else {}
+        self.max_tokens = max_tokens or GEMINI_CHUNK_TOKENS
+        self.max_articles = max_articles or GEMINI_PIPELINE_BATCH_ARTICLES
+        self.models = [model for model, _ in get_model_chain()]
+        self.articles = []
+        self.pieces = []
+        self.submit_wait = 0.0
+        self._current, self._current_tokens = [], 0
+        self._batches = []
+        workers = max(1, max_workers or GEMINI_MAX_WORKERS)
+        self._slots = threading.Semaphore(workers)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='gemini')
+
+    def add(self, article):
+        """加入一篇文章：命中单篇综述缓存时直接使用，否则加入当前批，批满时提交"""
+        position = len(self.articles)
+        self.articles.append(article)
+        self.pieces.append(load_cached_summary_for_models(article, self.prompt, self.models)[1])
+        if self.pieces[position] is not None:
+            return
+        tokens = estimate_article_tokens(article)
+        if self._current and self._current_tokens + tokens > self.max_tokens:
+            self._submit()
+        self._current.append(position)
+        self._current_tokens += tokens
+        if len(self._current) >= self.max_articles:
+            self._submit()
+
+    def _submit(self):
+        positions, self._current, self._current_tokens = self._current, [], 0
+        chunk = [self.articles[position] for position in positions]
+        index = len(self._batches)
+        if GEMINI_STREAM and index == 0:
+            ensure_dir_exists(DAILYBRIEF_DIR)
+        started = time.monotonic()
+        self._slots.acquire()
+        self.submit_wait += time.monotonic() - started
+        stats = {}
+        future = self._executor.submit(summarize_chunk, self.api_key, self.prompt, chunk, self.date_str, index, stats)
+        future.add_done_callback(lambda _: self._slots.release())
+        self._batches.append((positions, chunk, future, stats))
+        logger.info(f"第 {index + 1} 批综述已提交（{len(chunk)} 篇文章）")
+
+    def finish(self):
+        """提交剩余文章并等待所有批次完成，返回合并后的综述；没有文章或任一批失败时返回None"""
+        try:
+            if self._current:
+                self._submit()
+            parts = [future.result() for _, _, future, _ in self._batches]
+        finally:
+            self.close()
+        
+        hits = len(self.articles) - sum(len(positions) for positions, _, _, _ in self._batches)
+        logger.info(f"文章共 {len(self.articles)} 篇，综述缓存命中 {hits} 篇，分 {len(self._batches)} 批生成")
+        self.metadata.update({"articles": len(self.articles), "cache_hits": hits,
+                              "submit_wait": round(self.submit_wait, 3),
+                              "batches": [batch_metadata(chunk, stats) for _, chunk, _, stats in self._batches]})
+        if not self.articles:
+            return None
+        
+        failed = [index + 1 for index, part in enumerate(parts) if not part]
+        if failed:
+            logger.error(f"第 {failed} 批综述生成失败")
+            return None
+        
+        for (positions, _, _, stats), part in zip(self._batches, parts):
+            apply_chunk_summary(self.pieces, positions, self.articles, part, self.prompt,
+                                stats.get("model") or self.models[0])
+        return merge_summaries(self.pieces, self.date_str)
+
+    def close(self):
+        """关闭线程池：取消尚未开始的批次，不等待仍在运行的请求"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def save_brief_metadata(metadata, date_str=None):
+    """将简报的生成信息（模型、耗时等）保存到 dailybrief/<日期>.meta.json"""
+    filepath = os.path.join(DAILYBRIEF_DIR, f"{get_date_str(date_str)}.meta.json")
+    try:
+        with open(filepath, "w", encoding="utf-8") as f:
+            json.dump(metadata, f, ensure_ascii=False, indent=2)
+        return filepath
+    except OSError as e:
+        logger.warning(f"保存简报元数据失败: {str(e)}")
+        return None
+
+
+def save_daily_brief(content, date_str=None, metadata=None):
+    """保存每日简报，提供 metadata 时同时保存生成信息"""
+    try:
+        # 如果未指定日期，使用当前北京时间的日期
+        date_str = get_date_str(date_str)
         
         # 确保目录存在
         ensure_dir_exists(DAILYBRIEF_DIR)
@@ -233,9 +946,15 @@ def save_daily_brief(content, date_str=None):
         # 构建文件路径
         filepath = os.path.join(DAILYBRIEF_DIR, f"{date_str}.md")
         
-        # 保存简报
-        with open(filepath, "w", encoding="utf-8") as f:
+        # 先写临时文件再原子替换，避免留下写了一半的简报
+        tmp_path = filepath + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
             f.write(content)
+        os.replace(tmp_path, filepath)
+        remove_brief_parts(date_str)
+        if metadata is not None:
+            metadata.setdefault("generated_at", get_beijing_time().isoformat())
+            save_brief_metadata(metadata, date_str)
         
         logger.info(f"简报已保存到 {filepath}")
         return filepath
@@ -268,7 +987,8 @@ def generate_daily_brief(api_key=None, date_str=None):
     
     # 调用Gemini API
     logger.info(f"开始调用Gemini API生成摘要")
-    summary = call_gemini_api(api_key, prompt, articles)
+    metadata = {}
+    summary = summarize_articles(api_key, prompt, articles, date_str, metadata)
     if not summary:
         logger.error("Gemini API调用失败，无法生成摘要")
         return False
@@ -276,7 +996,7 @@ def generate_daily_brief(api_key=None, date_str=None):
     
     # 保存简报
     logger.info(f"开始保存简报")
-    filepath = save_daily_brief(summary, date_str)
+    filepath = save_daily_brief(summary, date_str, metadata)
     if not filepath:
         logger.error("简报保存失败")
         return False
@@ -285,6 +1005,57 @@ def generate_daily_brief(api_key=None, date_str=None):
     return True
 
 
+def find_missing_dates(date_from, date_to=None):
+    """返回 [date_from, date_to] 范围内有文章文件但没有对应简报的日期（YYYYMMDD，升序）"""
+    date_to = date_to or get_date_str()
+    if not os.path.isdir(ARTICLES_DIR):
+        return []
+    missing = []
+    for filename in sorted(os.listdir(ARTICLES_DIR)):
+        date_str, ext = os.path.splitext(filename)
+        if ext != '.md' or not (len(date_str) == 8 and date_str.isdigit()):
+            continue
+        if not (date_from <= date_str <= date_to):
+            continue
+        if not os.path.exists(os.path.join(DAILYBRIEF_DIR, f"{date_str}.md")):
+            missing.append(date_str)
+    return missing
+
+
+def backfill_daily_briefs(date_from, date_to=None, api_key=None, max_workers=None):
+    """补生成日期范围内缺失的简报，完成后只更新一次RSS
+
+    多个日期在有限大小的线程池中并行处理，所有Gemini请求共享 GEMINI_RPM 配额。
+    返回 {日期: 是否成功}。
+    """
+    dates = find_missing_dates(date_from, date_to)
+    if not dates:
+        logger.info(f"{date_from} 至 {date_to or '今天'} 之间没有缺失的简报")
+        return {}
+    logger.info(f"需要补生成 {len(dates)} 天的简报: {', '.join(dates)}")
+
+    max_workers = max(1, min(max_workers or GEMINI_BACKFILL_WORKERS, len(dates)))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {date_str: executor.submit(generate_daily_brief, api_key, date_str) for date_str in dates}
+    results = {}
+    for date_str, future in futures.items():
+        try:
+            results[date_str] = future.result()
+        except Exception as e:
+            logger.error(f"补生成 {date_str} 的简报时出错: {str(e)}")
+            results[date_str] = False
+
+    succeeded = [date_str for date_str, ok in results.items() if ok]
+    failed = [date_str for date_str, ok in results.items() if not ok]
+    logger.info(f"补生成完成: 成功 {len(succeeded)} 天，失败 {len(failed)} 天"
+                + (f" ({', '.join(failed)})" if failed else ""))
+
+    if succeeded:
+        # 所有日期处理完后统一重新生成一次RSS，而不是每天一次
+        rss_generator.update_feed()
+    return results
+
+
 def main():
     """主函数"""
     # 解析命令行参数
@@ -292,13 +1063,30 @@ def main():
     parser.add_argument("--api-key", help="Gemini API密钥，如果未提供则使用环境变量GEMINI_API_KEY")
     parser.add_argument("--date", help="指定日期 (YYYYMMDD格式)，默认为当天")
     parser.add_argument("--model", help="指定Gemini模型名称，如果未提供则使用环境变量GEMINI_MODEL或默认值")
+    parser.add_argument("--models", help="模型回退链，格式 \"模型:等待秒数,模型:等待秒数\"，覆盖环境变量GEMINI_MODELS")
+    parser.add_argument("--max-retries", type=int, help="Gemini API最大尝试次数，默认使用环境变量GEMINI_MAX_RETRIES或5")
+    parser.add_argument("--retry-base-delay", type=float, help="重试退避的基础等待秒数")
+    parser.add_argument("--retry-max-delay", type=float, help="单次重试的最大等待秒数")
+    parser.add_argument("--retry-deadline", type=float, help="单次调用（含重试）的总截止秒数")
+    parser.add_argument("--from", dest="date_from", help="批量补生成的起始日期 (YYYYMMDD格式)，补齐缺失的简报")
+    parser.add_argument("--to", dest="date_to", help="批量补生成的结束日期 (YYYYMMDD格式)，默认为当天")
+    parser.add_argument("--workers", type=int, help="批量补生成时并行处理的日期数，默认使用环境变量GEMINI_BACKFILL_WORKERS或2")
+    parser.add_argument("--rpm", type=float, help="Gemini API全局每分钟请求配额，覆盖环境变量GEMINI_RPM")
     args = parser.parse_args()
     
+    # 命令行参数覆盖默认重试策略
+    configure_retry(args.max_retries, args.retry_base_delay, args.retry_max_delay, args.retry_deadline)
+    configure_rate_limit(args.rpm)
+    
     # 如果提供了模型名称，设置环境变量
     if args.model:
         os.environ["GEMINI_MODEL"] = args.model
         logger.info(f"使用命令行指定的模型: {args.model}")
     
+    if args.models:
+        os.environ["GEMINI_MODELS"] = args.models
+        logger.info(f"使用命令行指定的模型回退链: {args.models}")
+    
     # 如果提供了API密钥，设置环境变量
     if args.api_key:
         os.environ["GEMINI_API_KEY"] = args.api_key
@@ -307,6 +1095,11 @@ def main():
     # 确保目录存在
     ensure_dir_exists(DAILYBRIEF_DIR)
     
+    if args.date_from:
+        # 批量补生成模式
+        backfill_daily_briefs(args.date_from, args.date_to, max_workers=args.workers)
+        return
+    
     # 生成每日简报
     success = generate_daily_brief(date_str=args.date)
     
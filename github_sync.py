@@ -1,7 +1,10 @@
 import os
 import requests
 import base64
+import hashlib
+import posixpath
 import logging
+import http_client
 from urllib.parse import urlparse
 
 # --- 配置日志 ---
@@ -11,6 +14,19 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 GIT_TOKEN = os.getenv("GIT_TOKEN")
 GIT_REPO_URL = os.getenv("GIT_REPO_URL")
 FEED_FILE_PATH = "feed.xml" # 相对于仓库根目录的文件路径
+# GitHub API 地址（GitHub Enterprise 或本地测试时可覆盖）与同步分支
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip('/')
+GIT_BRANCH = os.getenv("GIT_BRANCH", "main")
+# 通过 Git Data API 批量同步的文件和目录（逗号分隔，目录递归包含其中的文件）
+GIT_SYNC_PATHS = [p.strip() for p in os.getenv("GIT_SYNC_PATHS", "feed.xml,archive,dailybrief,articles").split(",") if p.strip()]
+# 不同步的临时文件后缀（原子写入的临时文件、流式生成的部分简报）
+SYNC_IGNORED_SUFFIXES = ('.tmp',)
+SYNC_IGNORED_MARKERS = ('.part',)
+# 远程分支在同步期间被更新（SHA 冲突）时，基于最新提交重试的次数
+SYNC_REBASE_ATTEMPTS = int(os.getenv("SYNC_REBASE_ATTEMPTS", "3"))
+
+class SyncConflictError(Exception):
+    """远程分支在提交期间被其他提交更新（409/422），需要基于最新提交重新同步"""
 
 def parse_repo_url(url):
     """从 GitHub URL 解析 owner 和 repo 名称"""
@@ -43,73 +59,48 @@ def get_github_api_headers(token):
         "Accept": "application/vnd.github.v3+json",
     }
 
-def get_remote_feed():
-    """从 GitHub 仓库获取 feed.xml 的内容和 SHA"""
+def git_blob_sha(content_bytes):
+    """计算内容的 git blob SHA（与 GitHub 返回的文件 SHA 相同）"""
+    header = f"blob {len(content_bytes)}\0".encode('utf-8')
+    return hashlib.sha1(header + content_bytes).hexdigest()
+
+def get_remote_file_sha(path):
+    """只通过父目录列表获取远程文件的 blob SHA，不下载文件内容
+
+    文件不存在或请求失败时返回 None。
+    """
     if not OWNER or not REPO:
         logging.error("无法确定 GitHub owner 或 repo。请检查 GIT_REPO_URL。")
-        return None, None
+        return None
 
-    api_url = f"https://api.github.com/repos/{OWNER}/{REPO}/contents/{FEED_FILE_PATH}"
+    parent, name = posixpath.split(path)
+    api_url = f"{GITHUB_API_URL}/repos/{OWNER}/{REPO}/contents/{parent}"
     try:
         headers = get_github_api_headers(GIT_TOKEN)
     except ValueError as e:
         logging.error(f"获取 API 请求头失败: {e}")
-        return None, None
+        return None
 
     try:
-        response = requests.get(api_url, headers=headers)
-        logging.info(f"GitHub API /contents 响应状态码: {response.status_code} for URL: {api_url}")
-
-        if response.status_code == 200:
-            data = response.json()
-            logging.debug(f"GitHub API /contents 完整响应: {data}") # 改为 debug 级别，避免日志过多
-
-            sha = data.get("sha")
-            content_base64 = data.get("content")
-            download_url = data.get("download_url")
-
-            if sha is None:
-                logging.error("GitHub API /contents 响应中缺少 'sha' 字段。")
-                return None, None # SHA 是必须的
-
-            if content_base64:
-                # 文件较小，直接从 content 字段解码
-                logging.info(f"文件 '{FEED_FILE_PATH}' 小于1MB，直接从 content 字段解码。")
-                content_bytes = base64.b64decode(content_base64)
-                content = content_bytes.decode('utf-8')
-                logging.info(f"成功从 GitHub 获取 '{FEED_FILE_PATH}' (SHA: {sha})")
-                return content, sha
-            elif download_url:
-                # 文件较大 (content 为 null)，通过 download_url 获取
-                logging.info(f"文件 '{FEED_FILE_PATH}' 大于1MB 或 content 为空，尝试从 download_url 获取: {download_url}")
-                try:
-                    # 注意：访问 download_url 通常不需要额外的认证头，因为它通常是预签名的 S3 URL
-                    # 但如果遇到权限问题，可以尝试也加上 headers
-                    download_response = requests.get(download_url) # 可以考虑添加 headers=headers 如果需要
-                    download_response.raise_for_status() # 如果下载失败则抛出异常
-                    content = download_response.text # 或者 .content.decode('utf-8') 如果编码有问题
-                    logging.info(f"成功通过 download_url 获取 '{FEED_FILE_PATH}' 内容 (SHA: {sha})")
-                    return content, sha
-                except requests.exceptions.RequestException as e_download:
-                    logging.error(f"通过 download_url 获取文件内容时出错: {e_download}")
-                    return None, None
-            else:
-                logging.error(f"GitHub API /contents 响应缺少 'content' 和 'download_url'。无法获取文件内容。SHA: {sha}")
-                return None, None
-
-        elif response.status_code == 404:
-            logging.info(f"远程仓库中未找到 '{FEED_FILE_PATH}'。将创建新文件。")
-            return None, None # 文件不存在，返回 None SHA
-        else:
-            logging.error(f"获取远程 feed 元数据失败: {response.status_code} - {response.text}")
-            return None, None
-    except requests.exceptions.RequestException as e_api:
-        logging.error(f"请求 GitHub API (/contents) 时出错: {e_api}")
-        return None, None
-    except Exception as e_general:
-        logging.error(f"处理 GitHub API (/contents) 响应时发生意外错误: {e_general}")
-        return None, None
-
+        response = http_client.get_session('github').get(api_url, headers=headers, params={"ref": GIT_BRANCH})
+        logging.info(f"GitHub API 目录列表响应状态码: {response.status_code} for URL: {api_url}")
+        if response.status_code == 404:
+            logging.info(f"远程仓库中未找到目录 '{parent or '/'}'。")
+            return None
+        if response.status_code != 200:
+            logging.error(f"获取远程目录列表失败: {response.status_code} - {response.text}")
+            return None
+        for item in response.json():
+            if item.get("name") == name and item.get("type") == "file":
+                return item.get("sha")
+        logging.info(f"远程仓库中未找到 '{path}'。将创建新文件。")
+        return None
+    except requests.exceptions.RequestException as e:
+        logging.error(f"请求 GitHub API (目录列表) 时出错: {e}")
+        return None
+    except Exception as e:
+        logging.error(f"处理 GitHub API (目录列表) 响应时发生意外错误: {e}")
+        return None
 
 def push_feed_to_github(local_file_path, commit_message, remote_sha):
     """将本地 feed.xml 推送到 GitHub 仓库"""
@@ -121,7 +112,7 @@ def push_feed_to_github(local_file_path, commit_message, remote_sha):
         logging.error(f"本地文件未找到: {local_file_path}")
         return False
 
-    url = f"https://api.github.com/repos/{OWNER}/{REPO}/contents/{FEED_FILE_PATH}"
+    url = f"{GITHUB_API_URL}/repos/{OWNER}/{REPO}/contents/{FEED_FILE_PATH}"
     try:
         headers = get_github_api_headers(GIT_TOKEN) # 使用 GIT_TOKEN
     except ValueError as e:
@@ -137,7 +128,7 @@ def push_feed_to_github(local_file_path, commit_message, remote_sha):
         data = {
             "message": commit_message,
             "content": content_base64,
-            "branch": "main" # 或者你的默认分支名
+            "branch": GIT_BRANCH
         }
 
         # 如果 remote_sha 存在，说明是更新现有文件，需要提供 SHA
@@ -145,7 +136,7 @@ def push_feed_to_github(local_file_path, commit_message, remote_sha):
             data["sha"] = remote_sha
         # 如果 remote_sha 为 None，说明是创建新文件，不需要 SHA
 
-        response = requests.put(url, headers=headers, json=data)
+        response = http_client.get_session('github').put(url, headers=headers, json=data)
 
         if response.status_code == 200:
             logging.info(f"成功更新远程 '{FEED_FILE_PATH}'")
@@ -169,43 +160,179 @@ def push_feed_to_github(local_file_path, commit_message, remote_sha):
         logging.error(f"读取本地文件或处理推送时发生意外错误: {e}")
         return False
 
-def sync_feed_to_github():
-    """执行核心的 feed 文件同步逻辑"""
+def is_configured():
+    """检查同步所需的令牌和仓库信息，未配置时记录错误并返回False"""
     if not GIT_TOKEN or not GIT_REPO_URL:
         logging.error("错误：请设置 GIT_TOKEN 和 GIT_REPO_URL 环境变量。")
         return False # 或者可以抛出异常
     elif not OWNER or not REPO:
         logging.error("错误：无法从 GIT_REPO_URL 解析仓库信息。请检查其格式。")
         return False
+    return True
+
+def sync_feed_to_github():
+    """执行核心的 feed 文件同步逻辑"""
+    if not is_configured():
+        return False
 
     logging.info(f"配置: Owner={OWNER}, Repo={REPO}")
 
-    # 1. 尝试获取远程文件
-    logging.info(f"--- 正在尝试从 GitHub 获取 {FEED_FILE_PATH} ---")
-    remote_content, current_sha = get_remote_feed()
-
-    if remote_content is not None:
-        logging.info(f"成功获取远程内容 (SHA: {current_sha})。")
-    elif current_sha is None and remote_content is None:
-        logging.warning(f"远程文件 {FEED_FILE_PATH} 不存在或获取失败。")
-    # else: # file not found case
-        # logging.info(f"远程文件 {FEED_FILE_PATH} 不存在。")
-
-    # 2. 准备一个本地文件用于测试推送
-    if os.path.exists(FEED_FILE_PATH):
-        logging.info(f"--- 正在尝试将本地 {FEED_FILE_PATH} 推送到 GitHub ---")
-        commit_msg = f"Update {FEED_FILE_PATH} via script"
-        success = push_feed_to_github(FEED_FILE_PATH, commit_msg, current_sha)
-        if success:
+    if not os.path.exists(FEED_FILE_PATH):
+        logging.info(f"跳过推送，因为本地文件 {FEED_FILE_PATH} 不存在。")
+        return False # 或者根据需求返回其他状态
+
+    # 1. 只获取远程文件的 SHA（不下载内容），与本地 blob SHA 比较
+    with open(FEED_FILE_PATH, 'rb') as f:
+        local_sha = git_blob_sha(f.read())
+    current_sha = get_remote_file_sha(FEED_FILE_PATH)
+    if current_sha == local_sha:
+        logging.info(f"远程 {FEED_FILE_PATH} 与本地一致 (SHA: {local_sha})，跳过推送。")
+        return True
+
+    # 2. 内容不同（或远程不存在）时推送
+    logging.info(f"--- 正在尝试将本地 {FEED_FILE_PATH} 推送到 GitHub (本地 SHA: {local_sha}, 远程 SHA: {current_sha}) ---")
+    commit_msg = f"Update {FEED_FILE_PATH} via script"
+    for attempt in range(SYNC_REBASE_ATTEMPTS):
+        if push_feed_to_github(FEED_FILE_PATH, commit_msg, current_sha):
             logging.info("推送成功！")
             return True
+        # 推送失败时重新获取远程 SHA：远程已被更新（409/422 冲突）则基于新 SHA 重试
+        latest_sha = get_remote_file_sha(FEED_FILE_PATH)
+        if latest_sha == local_sha:
+            logging.info("远程文件已与本地一致。")
+            return True
+        if latest_sha == current_sha:
+            break
+        logging.warning(f"远程 {FEED_FILE_PATH} 已更新 (SHA: {latest_sha})，重新推送 ({attempt + 1}/{SYNC_REBASE_ATTEMPTS})")
+        current_sha = latest_sha
+    logging.error("推送失败。")
+    return False
+
+def collect_sync_files(paths=None):
+    """展开需要同步的路径，返回 {仓库内路径: 本地文件路径}"""
+    files = {}
+    for path in (paths or GIT_SYNC_PATHS):
+        if os.path.isfile(path):
+            candidates = [path]
+        elif os.path.isdir(path):
+            candidates = [os.path.join(root, name) for root, _, names in os.walk(path) for name in names]
         else:
-            logging.error("推送失败。")
-            return False
-    else:
-        logging.info(f"跳过推送，因为本地文件 {FEED_FILE_PATH} 不存在。")
-        return False # 或者根据需求返回其他状态
+            continue
+        for local_path in candidates:
+            name = os.path.basename(local_path)
+            if name.endswith(SYNC_IGNORED_SUFFIXES) or any(marker in name for marker in SYNC_IGNORED_MARKERS):
+                continue
+            files[os.path.relpath(local_path).replace(os.sep, '/')] = local_path
+    return dict(sorted(files.items()))
+
+def github_api(method, path, **kwargs):
+    """调用 GitHub REST API（相对 /repos/{owner}/{repo}），返回响应"""
+    url = f"{GITHUB_API_URL}/repos/{OWNER}/{REPO}/{path}"
+    headers = get_github_api_headers(GIT_TOKEN)
+    return http_client.get_session('github').request(method, url, headers=headers, **kwargs)
+
+def get_remote_tree():
+    """获取分支最新提交及其完整文件树（只含元数据），返回 (提交SHA, 树SHA, {路径: blob SHA})"""
+    response = github_api("GET", f"git/ref/heads/{GIT_BRANCH}")
+    response.raise_for_status()
+    commit_sha = response.json()["object"]["sha"]
+
+    response = github_api("GET", f"git/commits/{commit_sha}")
+    response.raise_for_status()
+    tree_sha = response.json()["tree"]["sha"]
+
+    response = github_api("GET", f"git/trees/{tree_sha}", params={"recursive": "1"})
+    response.raise_for_status()
+    data = response.json()
+    if data.get("truncated"):
+        logging.warning("远程文件树过大被截断，部分未变化的文件可能会被重新上传。")
+    blobs = {item["path"]: item["sha"] for item in data.get("tree", []) if item.get("type") == "blob"}
+    return commit_sha, tree_sha, blobs
+
+def build_tree_entry(repo_path, content_bytes):
+    """构造新树中的文件条目：文本文件内联内容，其他文件先上传blob"""
+    entry = {"path": repo_path, "mode": "100644", "type": "blob"}
+    try:
+        entry["content"] = content_bytes.decode('utf-8')
+    except UnicodeDecodeError:
+        response = github_api("POST", "git/blobs", json={
+            "content": base64.b64encode(content_bytes).decode('utf-8'),
+            "encoding": "base64",
+        })
+        response.raise_for_status()
+        entry["sha"] = response.json()["sha"]
+    return entry
+
+def commit_changed_files(files, commit_message=None):
+    """基于分支最新提交，把内容有变化的文件提交为一次提交，返回提交的文件数（0 表示无变化）"""
+    head_sha, base_tree_sha, remote_blobs = get_remote_tree()
+
+    changed = []
+    for repo_path, local_path in files.items():
+        with open(local_path, 'rb') as f:
+            content_bytes = f.read()
+        if remote_blobs.get(repo_path) != git_blob_sha(content_bytes):
+            changed.append((repo_path, content_bytes))
+    if not changed:
+        logging.info(f"远程仓库与本地 {len(files)} 个文件一致，跳过提交。")
+        return 0
+    logging.info(f"共有 {len(changed)} 个文件需要同步: {', '.join(path for path, _ in changed)}")
+
+    response = github_api("POST", "git/trees", json={
+        "base_tree": base_tree_sha,
+        "tree": [build_tree_entry(repo_path, content_bytes) for repo_path, content_bytes in changed],
+    })
+    response.raise_for_status()
+    tree_sha = response.json()["sha"]
+
+    message = commit_message or f"Update {len(changed)} file(s) via script"
+    response = github_api("POST", "git/commits", json={
+        "message": message,
+        "tree": tree_sha,
+        "parents": [head_sha],
+    })
+    response.raise_for_status()
+    commit_sha = response.json()["sha"]
+
+    response = github_api("PATCH", f"git/refs/heads/{GIT_BRANCH}", json={"sha": commit_sha})
+    if response.status_code in (409, 422):
+        raise SyncConflictError(f"{response.status_code} - {response.text}")
+    response.raise_for_status()
+    logging.info(f"成功提交 {len(changed)} 个文件到 {GIT_BRANCH} (提交 SHA: {commit_sha})")
+    return len(changed)
+
+def sync_to_github(paths=None, commit_message=None):
+    """通过 Git Data API 将多个文件在一次提交中同步到 GitHub
+
+    比较本地 blob SHA 与远程文件树，只上传变化的文件：
+    读取 ref → 提交 → 文件树，创建新树 → 提交 → 更新 ref，
+    API 调用次数与变化的文件数量无关（非UTF-8文件需额外上传blob）。
+    分支在此期间被其他提交更新时，基于最新提交重新计算并重试。
+    """
+    if not is_configured():
+        return False
+
+    files = collect_sync_files(paths)
+    if not files:
+        logging.info("没有需要同步的本地文件。")
+        return False
+
+    try:
+        for attempt in range(SYNC_REBASE_ATTEMPTS):
+            try:
+                commit_changed_files(files, commit_message)
+                return True
+            except SyncConflictError as e:
+                logging.warning(f"分支 {GIT_BRANCH} 已被其他提交更新，基于最新提交重试 ({attempt + 1}/{SYNC_REBASE_ATTEMPTS}): {e}")
+        logging.error("多次重试后仍存在冲突，同步失败。")
+        return False
+    except requests.exceptions.RequestException as e:
+        logging.error(f"请求 GitHub Git Data API 时出错: {e}")
+        return False
+    except Exception as e:
+        logging.error(f"同步到 GitHub 时发生意外错误: {e}")
+        return False
 
 # --- 主执行逻辑 (用于直接运行脚本) ---
 if __name__ == "__main__":
-    sync_feed_to_github() # 调用新的主函数
\ No newline at end of file
+    sync_to_github()
\ No newline at end of file
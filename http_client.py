@@ -0,0 +1,62 @@
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+# 各服务的默认请求超时（秒），可通过环境变量 HTTP_TIMEOUT_<服务名> 覆盖
+SERVICE_TIMEOUTS = {
+    'atlantic': 15,
+    'gemini': 300,
+    'github': 30,
+    'default': 10,
+}
+
+# 每个主机保持的长连接数量
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", "10"))
+
+_sessions = {}
+_lock = threading.Lock()
+
+
+class ServiceSession(requests.Session):
+    """带默认超时的 requests.Session，未显式传入 timeout 时使用服务的默认值"""
+
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+def get_timeout(service):
+    """获取服务的请求超时，环境变量优先"""
+    env_value = os.environ.get(f"HTTP_TIMEOUT_{service.upper()}")
+    if env_value:
+        return float(env_value)
+    return SERVICE_TIMEOUTS.get(service, SERVICE_TIMEOUTS['default'])
+
+
+def get_session(service='default'):
+    """获取服务共享的 Session，同一服务的请求复用 TCP/TLS 连接"""
+    session = _sessions.get(service)
+    if session is not None:
+        return session
+    with _lock:
+        session = _sessions.get(service)
+        if session is None:
+            session = ServiceSession(get_timeout(service))
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _sessions[service] = session
+        return session
+
+
+def close_sessions():
+    """关闭所有共享 Session 及其连接池"""
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
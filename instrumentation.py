@@ -0,0 +1,198 @@
+import datetime
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# 运行报告目录，每次运行写入一个 <运行ID>.json
+RUNS_DIR = os.environ.get("RUNS_DIR", "runs")
+# 可选的性能剖析器：cprofile 或 pyinstrument，未设置时不剖析
+RUN_PROFILER = os.environ.get("RUN_PROFILER", "").lower()
+
+logger = logging.getLogger("instrumentation")
+
+_current = None
+
+
+def log_event(event, **fields):
+    """输出一行结构化（JSON）日志"""
+    fields = {'event': event, **fields}
+    logger.info(json.dumps(fields, ensure_ascii=False, default=str))
+
+
+class Run:
+    """一次任务运行的阶段耗时、字节计数和单篇文章跨度"""
+
+    def __init__(self, name):
+        now = datetime.datetime.now(datetime.timezone.utc)
+        self.name = name
+        self.run_id = f"{now.strftime('%Y%m%dT%H%M%SZ')}-{name}"
+        self.started_at = now.isoformat()
+        self.status = 'running'
+        self.error = None
+        self.stages = {}
+        self.counters = {}
+        self.spans = []
+        self.info = {}
+        self.report_path = None
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def elapsed(self):
+        return time.monotonic() - self._started
+
+    @contextmanager
+    def stage(self, name):
+        """记录一个阶段的耗时，同名阶段多次进入时累加"""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            duration = time.monotonic() - started
+            with self._lock:
+                stage = self.stages.setdefault(name, {'duration': 0.0, 'calls': 0})
+                stage['duration'] += duration
+                stage['calls'] += 1
+            log_event('stage', run=self.run_id, stage=name, duration=round(duration, 4))
+
+    def count(self, name, value=1):
+        """累加计数器（如字节数、文章数）"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    @contextmanager
+    def span(self, kind, **attrs):
+        """记录一个跨度（如单篇文章的抓取），yield 的字典可在跨度内补充属性"""
+        record = {'kind': kind, 'start': round(self.elapsed(), 4), **attrs}
+        started = time.monotonic()
+        try:
+            yield record
+        except Exception as e:
+            record['error'] = str(e)
+            raise
+        finally:
+            record['duration'] = round(time.monotonic() - started, 4)
+            with self._lock:
+                self.spans.append(record)
+
+    def set(self, key, value):
+        """记录附加信息"""
+        with self._lock:
+            self.info[key] = value
+
+    def report(self):
+        with self._lock:
+            return {
+                'run_id': self.run_id,
+                'name': self.name,
+                'started_at': self.started_at,
+                'duration': round(self.elapsed(), 4),
+                'status': self.status,
+                'error': self.error,
+                'stages': {name: {'duration': round(stage['duration'], 4), 'calls': stage['calls']}
+                           for name, stage in self.stages.items()},
+                'counters': dict(self.counters),
+                'spans': sorted(self.spans, key=lambda span: span['start']),
+                'info': dict(self.info),
+            }
+
+    def save(self, directory=None):
+        """原子写入JSON运行报告，返回文件路径"""
+        directory = directory or RUNS_DIR
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.run_id}.json")
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2, default=str)
+        os.replace(tmp_path, path)
+        return path
+
+
+@contextmanager
+def _profiler(run_id, directory):
+    """按 RUN_PROFILER 启用 cProfile 或 pyinstrument，结果写入运行报告目录"""
+    if RUN_PROFILER == 'cprofile':
+        import cProfile
+        # cProfile 只剖析当前线程，线程池中的抓取耗时体现在阶段计时中
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            os.makedirs(directory, exist_ok=True)
+            profiler.dump_stats(os.path.join(directory, f"{run_id}.prof"))
+        return
+    if RUN_PROFILER == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            logger.warning("RUN_PROFILER=pyinstrument 但未安装 pyinstrument，跳过剖析")
+        else:
+            profiler = Profiler()
+            profiler.start()
+            try:
+                yield
+            finally:
+                profiler.stop()
+                os.makedirs(directory, exist_ok=True)
+                with open(os.path.join(directory, f"{run_id}.html"), 'w', encoding='utf-8') as f:
+                    f.write(profiler.output_html())
+            return
+    yield
+
+
+@contextmanager
+def run(name, directory=None):
+    """开始一次被记录的运行，结束（含异常）时写入运行报告"""
+    global _current
+    directory = directory or RUNS_DIR
+    current = Run(name)
+    _current = current
+    log_event('run_start', run=current.run_id)
+    try:
+        with _profiler(current.run_id, directory):
+            yield current
+        current.status = 'ok'
+    except Exception as e:
+        current.status = 'error'
+        current.error = str(e)
+        raise
+    finally:
+        _current = None
+        try:
+            path = current.report_path = current.save(directory)
+        except OSError as e:
+            logger.error(f"写入运行报告失败: {str(e)}")
+            path = None
+        log_event('run_end', run=current.run_id, status=current.status,
+                  duration=round(current.elapsed(), 4), report=path)
+
+
+def current():
+    """返回当前运行，没有运行时返回None"""
+    return _current
+
+
+def stage(name):
+    """当前运行的阶段计时，没有运行时不做任何事"""
+    return _current.stage(name) if _current is not None else nullcontext()
+
+
+def span(kind, **attrs):
+    """当前运行的跨度，没有运行时返回一个不记录的字典"""
+    return _current.span(kind, **attrs) if _current is not None else nullcontext(dict(attrs))
+
+
+def count(name, value=1):
+    """累加当前运行的计数器"""
+    if _current is not None:
+        _current.count(name, value)
+
+
+def set_info(key, value):
+    """记录当前运行的附加信息"""
+    if _current is not None:
+        _current.set(key, value)
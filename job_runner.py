@@ -0,0 +1,170 @@
+import datetime
+import fcntl
+import json
+import os
+import socket
+import threading
+import time
+import traceback
+
+# 调度主节点锁文件：同一台机器上只有持有该锁的进程运行定时任务
+JOB_LOCK_FILE = os.environ.get("JOB_LOCK_FILE", "state/scheduler.lock")
+# 任务状态文件，由运行任务的进程写入，Web进程读取并通过 /jobs 返回
+JOB_STATUS_FILE = os.environ.get("JOB_STATUS_FILE", "state/job_status.json")
+# 未获得主节点锁时重试获取的间隔（秒），主节点退出后由其他进程接替
+LEADER_RETRY_INTERVAL = float(os.environ.get("LEADER_RETRY_INTERVAL", "30"))
+
+_status_lock = threading.Lock()
+_running = set()
+# 本进程持有的主节点锁；保留引用，避免锁对象被回收时文件关闭、锁被释放
+_held_locks = []
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+
+class LeaderLock:
+    """基于 fcntl 文件锁的单主节点锁，进程退出时操作系统自动释放"""
+
+    def __init__(self, path=None):
+        self.path = path or JOB_LOCK_FILE
+        self._file = None
+
+    @property
+    def held(self):
+        return self._file is not None
+
+    def acquire(self):
+        """非阻塞地尝试获取锁，成功时在锁文件中记录持有者信息"""
+        if self._file is not None:
+            return True
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        lock_file = open(self.path, 'a+')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        lock_file.seek(0)
+        lock_file.truncate()
+        json.dump({'pid': os.getpid(), 'host': socket.gethostname(), 'acquired_at': _now()}, lock_file)
+        lock_file.flush()
+        self._file = lock_file
+        return True
+
+    def release(self):
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+
+def read_leader(path=None):
+    """返回当前主节点信息；锁未被持有时返回None"""
+    path = path or JOB_LOCK_FILE
+    try:
+        with open(path, 'r') as f:
+            try:
+                # 能拿到锁说明没有主节点，立即释放
+                fcntl.flock(f, fcntl.LOCK_SH | fcntl.LOCK_NB)
+                fcntl.flock(f, fcntl.LOCK_UN)
+                return None
+            except OSError:
+                pass
+            return json.loads(f.read() or 'null')
+    except (OSError, ValueError):
+        return None
+
+
+def run_as_leader(start, lock=None, wait=True, timeout=None):
+    """获得主节点锁后调用 start()，返回持有的锁
+
+    wait 为True时阻塞直到获得锁；为False时在后台线程中定期重试，立即返回。
+    timeout 为阻塞等待的最长秒数（0 表示只尝试一次），超时未获得锁时不调用 start() 并返回None。
+    """
+    lock = lock or LeaderLock()
+    give_up_at = time.monotonic() + timeout if wait and timeout is not None else None
+
+    def acquire_and_start():
+        logged = False
+        while not lock.acquire():
+            leader = read_leader(lock.path) or {}
+            if give_up_at is not None and time.monotonic() >= give_up_at:
+                print(f"其他进程正在运行定时任务 (pid={leader.get('pid')}, host={leader.get('host')})，"
+                      f"未能获得主节点锁")
+                return False
+            if not logged:
+                limit = f"，最多等待 {timeout:g} 秒" if give_up_at is not None else ""
+                print(f"其他进程正在运行定时任务 (pid={leader.get('pid')}, host={leader.get('host')})，"
+                      f"每 {LEADER_RETRY_INTERVAL:g} 秒重试{limit}")
+                logged = True
+            delay = LEADER_RETRY_INTERVAL
+            if give_up_at is not None:
+                delay = min(delay, max(0.0, give_up_at - time.monotonic()))
+            time.sleep(delay)
+        _held_locks.append(lock)
+        print(f"已成为定时任务主节点 (pid={os.getpid()})")
+        start()
+        return True
+
+    if wait:
+        return lock if acquire_and_start() else None
+    threading.Thread(target=acquire_and_start, name='leader-election', daemon=True).start()
+    return lock
+
+
+def load_job_status(path=None):
+    """读取所有任务的状态"""
+    try:
+        with open(path or JOB_STATUS_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"读取任务状态失败: {str(e)}")
+        return {}
+
+
+def update_job_status(name, path=None, **fields):
+    """更新单个任务的状态字段并原子写入状态文件"""
+    path = path or JOB_STATUS_FILE
+    with _status_lock:
+        statuses = load_job_status(path)
+        status = statuses.setdefault(name, {})
+        status.update(fields)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(statuses, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+        return status
+
+
+def run_job(name, func, *args, **kwargs):
+    """运行任务并记录状态；同名任务正在运行时跳过"""
+    with _status_lock:
+        if name in _running:
+            print(f"任务 {name} 正在运行，跳过本次触发")
+            return None
+        _running.add(name)
+    started = time.monotonic()
+    update_job_status(name, state='running', started_at=_now(), pid=os.getpid(), host=socket.gethostname())
+    try:
+        result = func(*args, **kwargs)
+    except Exception as e:
+        update_job_status(name, state='error', finished_at=_now(), duration=round(time.monotonic() - started, 3),
+                          error=str(e), traceback=traceback.format_exc())
+        raise
+    else:
+        update_job_status(name, state='ok', finished_at=_now(), duration=round(time.monotonic() - started, 3),
+                          error=None, traceback=None, last_success_at=_now())
+        return result
+    finally:
+        with _status_lock:
+            _running.discard(name)
+
+
+def status_snapshot():
+    """返回当前主节点和各任务的状态，供 /jobs 接口使用"""
+    return {'leader': read_leader(), 'jobs': load_job_status()}
@@ -0,0 +1,210 @@
+import os
+import pytz
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+import atlantic_rss_reader
+import gemini_summarizer
+import rss_generator
+import sync_outbox
+import seen_index
+import http_client
+import instrumentation
+import job_runner
+import article_store
+import pipeline
+
+def stream_articles(entries, index, store, summarizer, date_str, unchanged=None):
+    """以流水线方式处理新文章：抓取 → 抽取正文 → 写入存储 → 提交分批综述
+
+    前面的文章在后面的文章仍在下载时就开始生成综述；各阶段的吞吐量、背压和错误数写入运行报告。
+    返回正文有变化的文章 [(条目, 正文, 记录)]，保持RSS源中的顺序。
+    文章先写入当天的暂存记录，运行成功后由 store.commit_day 替换当天的正式记录。
+    正文未变化的文章追加到 unchanged（如果传入）。
+    单篇文章抓取或抽取失败时只跳过该文章；存储或提交综述失败时抛出 pipeline.PipelineError。
+    """
+    def fetch(entry):
+        page_html = atlantic_rss_reader.fetch_article_page(entry['link'])
+        return (entry, page_html) if page_html is not None else None
+    
+    def extract(item):
+        entry, page_html = item
+        content = atlantic_rss_reader.extract_article_content(page_html, entry['link'])
+        if not content:
+            return None
+        # 正文未变化的文章不再送去生成综述，只记录新的updated时间
+        if not index.has_changed(entry, content):
+            index.touch(entry)
+            if unchanged is not None:
+                unchanged.append(entry)
+            return None
+        return entry, content
+    
+    stored = []
+    staging = store.staging_date(date_str)
+    
+    def save(item):
+        entry, content = item
+        record = atlantic_rss_reader.build_article_record(entry, content)
+        if not stored:
+            # 清除之前失败的运行留下的暂存记录
+            store.save_day(staging, [])
+        store.save_article(staging, len(stored), record)
+        stored.append(record)
+        return entry, content, record
+    
+    def summarize(item):
+        summarizer.add(gemini_summarizer.article_from_record(item[2]))
+        return item
+    
+    article_pipeline = pipeline.Pipeline([
+        pipeline.Stage('fetch', fetch, workers=min(atlantic_rss_reader.FETCH_WORKERS, len(entries))),
+        pipeline.Stage('extract', extract, workers=pipeline.PIPELINE_EXTRACT_WORKERS),
+        # 已写入存储的文章必须进入综述，存储或提交综述失败时中止本次运行
+        pipeline.Stage('store', save, ordered=True, required=True),
+        pipeline.Stage('summarize', summarize, ordered=True, required=True),
+    ])
+    print(f"开始以流水线方式处理 {len(entries)} 篇文章 (抓取并行数: {article_pipeline.stages[0].workers})")
+    try:
+        return article_pipeline.run(entries)
+    finally:
+        report = article_pipeline.report()
+        instrumentation.set_info('pipeline', report)
+        instrumentation.log_event('pipeline', **report)
+
+# 主要任务流程
+def process_articles():
+    """抓取新文章、生成综述、更新feed并加入同步队列，返回本次运行的记录"""
+    index = None
+    current = None
+    try:
+        with instrumentation.run('process_articles') as run:
+            current = run
+            # 1. 抓取文章
+            with run.stage('rss_fetch'):
+                rss_content = atlantic_rss_reader.fetch_rss_feed()
+            if not rss_content:
+                print("获取RSS内容失败")
+                return run
+            
+            with run.stage('rss_parse'):
+                entries = atlantic_rss_reader.parse_rss(rss_content)
+            if not entries:
+                print("解析RSS内容失败")
+                return run
+            
+            # 跳过已处理过的文章，水位丢失时也不会重复处理
+            index = seen_index.SeenIndex()
+            new_entries = index.filter_new(entries)
+            run.count('entries', len(entries))
+            run.count('new_entries', len(new_entries))
+            if not new_entries:
+                print("没有新的文章")
+                return run
+            
+            # 确保目录存在
+            atlantic_rss_reader.setup_directory()
+            
+            # 文章、简报统一使用北京时间的日期
+            date_str = gemini_summarizer.get_date_str()
+            metadata = {}
+            summarizer = gemini_summarizer.StreamingSummarizer(prompt=gemini_summarizer.DEFAULT_PROMPT,
+                                                               date_str=date_str, metadata=metadata)
+            store = article_store.ArticleStore()
+            unchanged = []
+            try:
+                # 抓取、抽取、存储与生成综述以流水线方式重叠进行
+                with run.stage('pipeline'):
+                    processed = stream_articles(new_entries, index, store, summarizer, date_str, unchanged)
+                run.count('articles', len(processed))
+                if not processed:
+                    print("没有需要生成综述的文章")
+                    return run
+                
+                # 2. 等待剩余批次的综述并合并
+                with run.stage('summarize'):
+                    summary = summarizer.finish()
+                if not summary:
+                    # 有文章需要综述却没有生成，本次运行记为失败，不替换当天的记录
+                    raise RuntimeError(f"{len(processed)} 篇文章的综述生成失败")
+                
+                # 综述生成成功后才用本次的文章替换当天的记录，并导出Markdown文件作为可读视图
+                with run.stage('store'):
+                    store.commit_day(date_str)
+                    records = [record for _, _, record in processed]
+                    atlantic_rss_reader.save_articles_to_file(
+                        ''.join(atlantic_rss_reader.format_record(record) for record in records), date_str)
+            finally:
+                run.set('gemini', metadata)
+                summarizer.close()
+                store.close()
+            run.count('brief_bytes', len(summary.encode('utf-8')))
+            gemini_summarizer.save_daily_brief(summary, date_str, metadata=metadata)
+            
+            # 3. 更新RSS feed
+            with run.stage('feed_build'):
+                rss_generator.update_feed()
+            if os.path.exists(rss_generator.FEED_FILE):
+                run.count('feed_bytes', os.path.getsize(rss_generator.FEED_FILE))
+            # 记录已处理的文章并推进处理水位，下次只抓取更新的文章；
+            # 水位不越过抓取或抽取失败的文章，下次运行时重试
+            for entry, article_content, _ in processed:
+                index.mark_seen(entry, article_content)
+            settled = {id(entry) for entry, _, _ in processed} | {id(entry) for entry in unchanged}
+            failed = [entry for entry in new_entries if id(entry) not in settled]
+            if failed:
+                print(f"{len(failed)} 篇文章抓取或抽取失败，水位不越过其中最早的一篇")
+            atlantic_rss_reader.update_watermark(entries, failed)
+            
+            # 4. 同步到Git仓库：先写入持久化队列，失败时由后台线程退避重试
+            with run.stage('github_sync'):
+                outbox = sync_outbox.get_outbox()
+                if outbox.enqueue() is not None:
+                    outbox.flush()
+    except Exception as e:
+        print(f"处理文章时出错: {str(e)}")
+    finally:
+        if index is not None:
+            index.close()
+    return current
+
+def run_process_articles():
+    """定时任务入口：运行主流程并记录任务状态，失败时抛出异常"""
+    def run():
+        current = process_articles()
+        if current is not None:
+            job_runner.update_job_status('process_articles', report=current.report_path,
+                                         counters=current.counters)
+            if current.status == 'error':
+                raise RuntimeError(current.error)
+    return job_runner.run_job('process_articles', run)
+
+def ping_self():
+    """保活任务：请求 PING_URL"""
+    ping_url = os.environ.get('PING_URL')
+    try:
+        # 复用共享会话的长连接，避免每次保活都重新握手
+        http_client.get_session('default').get(ping_url)
+        print(f"Successfully pinged {ping_url}")
+    except Exception as e:
+        print(f"Ping failed: {str(e)}")
+
+def register_jobs(scheduler):
+    """在调度器中注册定时任务（兼容 flask_apscheduler 和 APScheduler）"""
+    # 每天北京时间中午12点执行
+    scheduler.add_job(
+        id='process_articles',
+        func=run_process_articles,
+        trigger=CronTrigger(hour=12, minute=0, timezone=pytz.timezone('Asia/Shanghai'))
+    )
+    
+    # 保活任务 - 如果设置了URL，每5分钟ping一次
+    if os.environ.get('PING_URL'):
+        scheduler.add_job(
+            id='ping_self',
+            func=ping_self,
+            trigger=IntervalTrigger(minutes=5)
+        )
+
+def start_background_sync():
+    """启动后台同步线程（继续上次未完成的同步），并在后台同步feed、归档、简报和文章"""
+    sync_outbox.get_outbox().start().enqueue()
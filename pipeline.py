@@ -0,0 +1,199 @@
+import heapq
+import logging
+import os
+import queue
+import threading
+import time
+
+# 流水线相邻阶段之间的队列容量；队列满时上游阶段阻塞等待（背压）
+PIPELINE_QUEUE_SIZE = int(os.environ.get("PIPELINE_QUEUE_SIZE", "4"))
+# 正文抽取阶段的线程数（lxml 解析时会释放GIL）
+PIPELINE_EXTRACT_WORKERS = int(os.environ.get("PIPELINE_EXTRACT_WORKERS", "2"))
+
+logger = logging.getLogger("pipeline")
+
+_DONE = object()
+
+
+class PipelineError(Exception):
+    """必需阶段处理失败，流水线已中止"""
+
+
+class Stage:
+    """流水线的一个阶段：func 处理单个元素，返回None表示丢弃该元素
+
+    ordered 为True时按输入顺序逐个处理（只能有一个工作线程），适合写存储、分批等有状态的阶段。
+    required 为False时处理失败的元素只被丢弃并计入 errors；为True时任一元素失败即中止整个流水线。
+    """
+
+    def __init__(self, name, func, workers=1, ordered=False, required=False):
+        if ordered and workers != 1:
+            raise ValueError(f"按顺序处理的阶段 {name} 只能有一个工作线程")
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.ordered = ordered
+        self.required = required
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.items = 0
+        self.output = 0
+        self.errors = 0
+        self.skipped = 0
+        self.busy = 0.0
+        self.idle = 0.0
+        self.blocked = 0.0
+        self.max_queue = 0
+        self.first_at = None
+        self.last_at = None
+
+    def _record(self, **values):
+        with self._lock:
+            for name, value in values.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def report(self):
+        """阶段统计：处理数、吞吐量（篇/秒）、工作/等待输入/等待下游（背压）的时间"""
+        with self._lock:
+            wall = (self.last_at - self.first_at) if self.first_at is not None else 0.0
+            return {
+                'workers': self.workers,
+                'items': self.items,
+                'output': self.output,
+                'dropped': self.items - self.output - self.errors,
+                'errors': self.errors,
+                'skipped': self.skipped,
+                'wall': round(wall, 4),
+                'throughput': round(self.items / wall, 3) if wall > 0 else None,
+                'busy': round(self.busy, 4),
+                'utilization': round(self.busy / (wall * self.workers), 3) if wall > 0 else None,
+                'idle': round(self.idle, 4),
+                'blocked': round(self.blocked, 4),
+                'max_queue': self.max_queue,
+            }
+
+
+class Pipeline:
+    """由有界队列连接的多阶段流水线，各阶段在各自的线程中并发运行
+
+    下游处理不过来时队列被填满，上游在 put 时阻塞，阻塞时间记为该阶段的 blocked（背压）。
+    元素带有输入序号，被丢弃的元素以None继续向下游传递，以便按顺序处理的阶段恢复原顺序。
+    必需阶段失败时停止读入新元素，其余元素不再处理（计入 skipped），run() 抛出 PipelineError。
+    """
+
+    def __init__(self, stages, queue_size=None):
+        self.stages = list(stages)
+        self.queue_size = queue_size or PIPELINE_QUEUE_SIZE
+        self.duration = 0.0
+        self.error = None
+        self._failed = threading.Event()
+        self._lock = threading.Lock()
+
+    def run(self, items):
+        """运行流水线，返回最后一个阶段输出的非None结果（保持输入顺序）"""
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        threads = []
+        started = time.monotonic()
+        self.error = None
+        self._failed.clear()
+        for position, stage in enumerate(self.stages):
+            stage.reset()
+            remaining = [stage.workers]
+            for number in range(stage.workers):
+                thread = threading.Thread(target=self._work, name=f"pipeline-{stage.name}-{number}", daemon=True,
+                                          args=(stage, queues[position], queues[position + 1], remaining))
+                thread.start()
+                threads.append(thread)
+        feeder = threading.Thread(target=self._feed, args=(items, queues[0]), name='pipeline-feed', daemon=True)
+        feeder.start()
+
+        results = {}
+        while True:
+            item = queues[-1].get()
+            if item is _DONE:
+                break
+            seq, value = item
+            if value is not None:
+                results[seq] = value
+        feeder.join()
+        for thread in threads:
+            thread.join()
+        self.duration = time.monotonic() - started
+        if self.error is not None:
+            raise PipelineError(self.error)
+        return [results[seq] for seq in sorted(results)]
+
+    def _feed(self, items, outbox):
+        for seq, item in enumerate(items):
+            if self._failed.is_set():
+                break
+            outbox.put((seq, item))
+        outbox.put(_DONE)
+
+    def _work(self, stage, inbox, outbox, remaining):
+        pending = []
+        next_seq = 0
+        while True:
+            waited = time.monotonic()
+            item = inbox.get()
+            stage._record(idle=time.monotonic() - waited)
+            if item is _DONE:
+                # 通知同一阶段的其他工作线程；最后一个退出的线程向下游传递结束标记
+                inbox.put(_DONE)
+                with stage._lock:
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                if last:
+                    outbox.put(_DONE)
+                return
+            with stage._lock:
+                stage.max_queue = max(stage.max_queue, inbox.qsize() + 1)
+            if not stage.ordered:
+                self._process(stage, item, outbox)
+                continue
+            # 按序号恢复输入顺序后再处理
+            heapq.heappush(pending, item)
+            while pending and pending[0][0] == next_seq:
+                self._process(stage, heapq.heappop(pending), outbox)
+                next_seq += 1
+
+    def _process(self, stage, item, outbox):
+        seq, value = item
+        result = None
+        if value is not None and self._failed.is_set():
+            stage._record(skipped=1)
+        elif value is not None:
+            started = time.monotonic()
+            with stage._lock:
+                if stage.first_at is None:
+                    stage.first_at = started
+            try:
+                result = stage.func(value)
+            except Exception as e:
+                logger.error(f"流水线阶段 {stage.name} 处理失败: {str(e)}")
+                stage._record(errors=1)
+                if stage.required:
+                    with self._lock:
+                        if self.error is None:
+                            self.error = f"阶段 {stage.name} 处理失败: {str(e)}"
+                    self._failed.set()
+            finished = time.monotonic()
+            stage._record(items=1, output=int(result is not None), busy=finished - started)
+            with stage._lock:
+                stage.last_at = finished
+        waited = time.monotonic()
+        outbox.put((seq, result))
+        stage._record(blocked=time.monotonic() - waited)
+
+    def report(self):
+        """各阶段的吞吐量与背压统计"""
+        stages = {stage.name: stage.report() for stage in self.stages}
+        return {
+            'duration': round(self.duration, 4),
+            'queue_size': self.queue_size,
+            'errors': sum(stage['errors'] for stage in stages.values()),
+            'error': self.error,
+            'stages': stages,
+        }
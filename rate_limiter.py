@@ -0,0 +1,67 @@
+import threading
+import time
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """线程安全的令牌桶限速器"""
+
+    def __init__(self, rate, capacity=1):
+        # rate: 每秒补充的令牌数；capacity: 桶容量（允许的突发请求数）
+        if rate <= 0:
+            raise ValueError("rate 必须大于0")
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(capacity))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens=1, cancel=None):
+        """获取令牌，不足时阻塞等待，返回实际等待的秒数
+
+        cancel 为 threading.Event，等待期间被设置时不再获取令牌，直接返回已等待的秒数。
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            if cancel is not None:
+                if cancel.wait(delay):
+                    return waited
+            else:
+                time.sleep(delay)
+            waited += delay
+
+
+class HostRateLimiter:
+    """按主机名分别维护令牌桶的限速器"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket_for(self, url):
+        """返回URL所属主机的令牌桶"""
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(self.rate, self.capacity)
+                self._buckets[host] = bucket
+            return bucket
+
+    def acquire(self, url):
+        """为URL所属主机获取一个令牌"""
+        return self.bucket_for(url).acquire()
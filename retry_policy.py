@@ -0,0 +1,112 @@
+import datetime
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+# 默认可重试的HTTP状态码：限流与服务端临时错误
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+
+def parse_retry_after(value):
+    """解析 Retry-After 头（秒数或HTTP日期），无法解析时返回None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=datetime.timezone.utc)
+    return max(0.0, (retry_at - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+
+
+class RetryPolicy:
+    """指数退避 + 全抖动的重试策略，支持 Retry-After 和总截止时间"""
+
+    def __init__(self, max_attempts=5, base_delay=5.0, max_delay=120.0, deadline=900.0,
+                 retry_statuses=RETRYABLE_STATUS_CODES):
+        self.max_attempts = max(1, int(max_attempts))
+        self.base_delay = float(base_delay)
+        self.max_delay = float(max_delay)
+        self.deadline = float(deadline) if deadline else None
+        self.retry_statuses = frozenset(retry_statuses)
+
+    def is_retryable(self, status_code):
+        """状态码是否值得重试"""
+        return status_code in self.retry_statuses
+
+    def backoff(self, attempt):
+        """第attempt次失败（从0开始）后的等待时间：在 [0, min(max, base*2^attempt)] 内均匀抖动"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def next_delay(self, attempt, response=None):
+        """计算下一次重试前的等待时间，服务器给出 Retry-After 时优先使用"""
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if retry_after is not None:
+                return retry_after
+        return self.backoff(attempt)
+
+    def start(self):
+        """开始一次调用，返回截止时间（monotonic），未设置截止时间时返回None"""
+        return time.monotonic() + self.deadline if self.deadline else None
+
+    def within_deadline(self, deadline, delay):
+        """等待delay秒后是否仍在截止时间之内"""
+        return deadline is None or time.monotonic() + delay < deadline
+
+
+class CircuitBreaker:
+    """连续失败达到阈值后熔断一段时间，冷却后放行一次探测请求"""
+
+    def __init__(self, failure_threshold=5, reset_timeout=300.0):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = float(reset_timeout)
+        self._failures = 0
+        self._opened_at = None
+        # 半开状态下正在进行探测的线程，探测结束前拒绝其他请求
+        self._probe_owner = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return 'half-open'
+            return 'open'
+
+    def allow(self):
+        """是否允许发出请求；半开状态下同一时间只放行一个探测请求"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._probe_owner is not None:
+                return False
+            self._probe_owner = threading.get_ident()
+            return True
+
+    def release(self):
+        """当前线程的探测请求没有得出成功或失败的结论（如客户端错误、被取消）时归还探测名额"""
+        with self._lock:
+            if self._probe_owner == threading.get_ident():
+                self._probe_owner = None
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probe_owner = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                # 半开状态下探测失败或连续失败达到阈值，重新计时熔断
+                self._opened_at = time.monotonic()
+            self._probe_owner = None
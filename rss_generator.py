@@ -1,15 +1,53 @@
 import os
 import datetime
+import json
+from email.utils import parsedate_to_datetime
 from pathlib import Path
 from feedgen.feed import FeedGenerator
+from feedgen.entry import FeedEntry
+from lxml import etree
 import markdown
 import re
 from xml.etree import ElementTree as ET
+from xml.sax.saxutils import quoteattr
+import feed_cache
 
 # 配置
 DAILYBRIEF_DIR = Path('dailybrief')
 FEED_FILE = 'feed.xml'
-MAX_ENTRIES = 50
+MAX_ENTRIES = int(os.environ.get('MAX_ENTRIES', '50'))
+# 主feed的字节预算，超出条目数或字节预算的旧条目移入归档页
+MAX_FEED_BYTES = int(os.environ.get('MAX_FEED_BYTES', str(512 * 1024)))
+
+# 归档页（RFC 5005 prev-archive）目录及每页条目数
+ARCHIVE_DIR = os.environ.get('ARCHIVE_DIR', 'archive')
+ARCHIVE_PAGE_SIZE = int(os.environ.get('ARCHIVE_PAGE_SIZE', '30'))
+# feed的公开访问地址前缀，未设置时归档链接使用相对路径
+FEED_BASE_URL = os.environ.get('FEED_BASE_URL', '')
+# 已归档条目的GUID索引，避免已移出主feed的综述被当作新条目重新加入
+ARCHIVE_INDEX = os.environ.get('ARCHIVE_INDEX', 'state/feed_archive_index.txt')
+HISTORY_NS = 'http://purl.org/syndication/history/1.0'
+
+# 生成模式：incremental 只渲染新增条目并拼接到输出中；full 使用feedgen完整重建
+FEED_MODE = os.environ.get('FEED_MODE', 'incremental')
+# 增量模式的条目存储，每行一个JSON记录，以GUID为键
+FEED_STORE = os.environ.get('FEED_STORE', 'state/feed_items.jsonl')
+BRIEF_URL_PREFIX = 'https://www.theatlantic.com/daily-brief/'
+
+# feed文件保存后需要通知的回调（例如Web服务的内存缓存）
+_feed_listeners = []
+
+def add_feed_listener(callback):
+    """注册feed保存后的回调函数"""
+    _feed_listeners.append(callback)
+
+def notify_feed_saved():
+    """通知所有回调feed已更新"""
+    for callback in _feed_listeners:
+        try:
+            callback()
+        except Exception as e:
+            print(f"feed更新回调执行失败：{str(e)}")
 
 def setup_feed_generator():
     """初始化FeedGenerator"""
@@ -129,50 +167,269 @@ def generate_feed():
             print(f"处理文件 {file_path} 时出错：{str(e)}")
             continue
     
-    # 如果条目总数超过限制，删除最早的条目
+    # 如果条目总数超过限制，只保留最新的 MAX_ENTRIES 条
     entries = fg.entry()
     if len(entries) > MAX_ENTRIES:
-        # 对条目按发布日期降序排序
-        entries.sort(key=lambda x: x.published() if x.published() else datetime.datetime.min.replace(tzinfo=datetime.timezone.utc), reverse=True)
-        # 保留最新的 MAX_ENTRIES 条目
-        # 通过创建一个新的列表并重新赋值给 fg.entry() 来更新条目
-        # 或者找到 feedgen 库推荐的更新条目的方式
-        # 一个直接的方式是清空然后重新添加，但更优的是直接修改列表
-        # 从 feedgen 的使用来看，fg.entry() 返回的列表可以直接修改
-        del entries[MAX_ENTRIES:]
-        # 注意：如果 fg.entry() 返回的是一个拷贝，则上述 del entries[MAX_ENTRIES:] 无效
-        # 需要确认 feedgen 的行为。更安全的方式是重新设置条目。
-        # 假设 fg.entry() 返回的列表可以直接修改，如果不行，则需要找到 feedgen 清除和重设条目的方法。
-        # 查阅 feedgen 文档，似乎没有直接替换所有条目的方法，但 fg._FeedGenerator__feed['entries'] 是其内部存储。
-        # 为了避免直接访问私有成员，我们可以尝试清除所有条目然后重新添加排序和截断后的条目。
-        # 然而，最直接且之前代码意图明确的方式是直接操作内部列表，但我们想避免它。
-        # 另一种方法是创建一个新的FeedGenerator实例，只添加需要的条目，但这会丢失其他feed设置。
-
-        # 鉴于原始代码的意图，并且考虑到 feedgen 可能没有提供完美的公共 API 来做这件事，
-        # 我们尝试一种稍微安全一点的方式，即获取所有条目，排序，截断，然后清除原 fg 中的所有条目，再把截断后的条目加回去。
-        # feedgen 没有 fg.clear_entries()。 
-        # 最接近原始意图且避免直接访问 __feed 的方式是操作 fg.entry() 返回的列表。
-        # 如果 fg.entry() 返回的列表修改后能直接反映到 FeedGenerator 实例中，那么 del entries[MAX_ENTRIES:] 是有效的。
-        # 我们将采用这种方式，如果它不起作用，说明 feedgen 的这个接口行为与预期不符。
-        # 在许多类似库中，返回的集合通常是可变的并且更改会反映出来。
+        entries = sorted(entries, key=lambda x: x.published() if x.published() else datetime.datetime.min.replace(tzinfo=datetime.timezone.utc), reverse=True)
+        fg.entry(entries[:MAX_ENTRIES], replace=True)
         print(f"已限制feed条目数量为{MAX_ENTRIES}条")
     
     return fg
 
+def write_feed(content):
+    """将渲染好的feed内容写入文件，并生成压缩版本、通知回调"""
+    tmp_file = FEED_FILE + '.tmp'
+    with open(tmp_file, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_file, FEED_FILE)
+    print(f"RSS feed已保存到：{FEED_FILE}")
+    # 生成一次预压缩版本，Web服务按Accept-Encoding直接返回
+    for variant_path in feed_cache.write_compressed_variants(FEED_FILE):
+        print(f"压缩版本已保存到：{variant_path}")
+    notify_feed_saved()
+
 def save_feed(fg):
     """保存RSS feed到文件"""
     try:
-        fg.rss_file(FEED_FILE, pretty=True)
-        print(f"RSS feed已保存到：{FEED_FILE}")
+        write_feed(fg.rss_str(pretty=True))
     except Exception as e:
         print(f"保存RSS feed失败：{str(e)}")
 
+def render_item(guid, title, link, description, published):
+    """使用feedgen渲染单个<item>片段，缩进与完整feed一致"""
+    fe = FeedEntry()
+    fe.id(guid)
+    fe.title(title)
+    fe.link(href=link)
+    fe.description(description)
+    fe.published(published)
+    fe.updated(published)
+    item = fe.rss_entry()
+    etree.indent(item, space='  ', level=2)
+    return etree.tostring(item, encoding='unicode')
+
+def load_feed_store():
+    """读取增量模式的条目存储；不存在时从现有feed.xml导入一次"""
+    if not os.path.exists(FEED_STORE):
+        return import_existing_feed()
+    records = []
+    with open(FEED_STORE, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                records.append(json.loads(line))
+    return records
+
+def save_feed_store(records):
+    """写入增量模式的条目存储"""
+    os.makedirs(os.path.dirname(FEED_STORE) or '.', exist_ok=True)
+    tmp_file = FEED_STORE + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+    os.replace(tmp_file, FEED_STORE)
+
+def import_existing_feed():
+    """将现有feed.xml中的条目转换为存储记录"""
+    records = import_feed_items(FEED_FILE)
+    print(f"已从{FEED_FILE}导入{len(records)}个条目")
+    return records
+
+def import_feed_items(path):
+    """读取feed文件中的条目，保留原始的<item>片段"""
+    if not os.path.exists(path):
+        return []
+    try:
+        root = ET.parse(path).getroot()
+    except Exception as e:
+        print(f"读取feed文件{path}失败：{str(e)}")
+        return []
+    records = []
+    for item in root.iter('item'):
+        guid = item.findtext('guid')
+        pub_date = item.findtext('pubDate')
+        if not guid or not pub_date:
+            continue
+        item.tail = None
+        records.append({
+            'guid': guid,
+            'date': parsedate_to_datetime(pub_date).isoformat(),
+            'xml': ET.tostring(item, encoding='unicode')
+        })
+    return records
+
+def sort_records(records):
+    """按发布时间（而非字符串）降序排列条目"""
+    records.sort(key=lambda record: datetime.datetime.fromisoformat(record['date']), reverse=True)
+    return records
+
+def render_feed(records, links=(), archive=False):
+    """拼接频道头部与条目片段，生成完整的feed内容
+
+    links 为 (rel, href) 列表，写入 atom:link；archive 为 True 时标记为RFC 5005归档页。
+    """
+    header = setup_feed_generator().rss_str(pretty=True).decode('utf-8')
+    head, tail = header.rsplit('  </channel>', 1)
+    if archive:
+        head = head.replace('<rss ', f'<rss xmlns:fh="{HISTORY_NS}" ', 1) + '    <fh:archive/>\n'
+    parts = [head]
+    for rel, href in links:
+        parts.append(f'    <atom:link href={quoteattr(href)} rel="{rel}"/>\n')
+    for record in records:
+        parts.append(f"    {record['xml'].strip()}\n")
+    parts.append('  </channel>' + tail)
+    return ''.join(parts).encode('utf-8')
+
+def feed_url(path, relative):
+    """生成feed之间的链接：设置了FEED_BASE_URL时使用绝对地址，否则使用相对路径"""
+    if FEED_BASE_URL:
+        return f"{FEED_BASE_URL.rstrip('/')}/{path}"
+    return relative
+
+def archive_page_name(number):
+    """归档页文件名，页码从最早的一页开始编号"""
+    return f"feed-{number:04d}.xml"
+
+def list_archive_pages():
+    """返回已存在的归档页页码（升序）"""
+    if not os.path.isdir(ARCHIVE_DIR):
+        return []
+    numbers = []
+    for name in os.listdir(ARCHIVE_DIR):
+        match = re.fullmatch(r'feed-(\d+)\.xml', name)
+        if match:
+            numbers.append(int(match.group(1)))
+    return sorted(numbers)
+
+def split_retained(records, header_size):
+    """按条目数和字节预算划分保留在主feed与需要归档的条目（records已降序排列）"""
+    size = header_size
+    for index, record in enumerate(records):
+        size += len(record['xml'].encode('utf-8')) + 5
+        # 至少保留一条，避免单个超大条目导致主feed为空
+        if index >= MAX_ENTRIES or (index > 0 and size > MAX_FEED_BYTES):
+            return records[:index], records[index:]
+    return records, []
+
+def write_archive_page(number, records, latest):
+    """渲染并写入一个归档页，包含current/prev-archive/next-archive链接"""
+    links = [('current', feed_url(FEED_FILE, f'../{FEED_FILE}'))]
+    if number > 1:
+        name = archive_page_name(number - 1)
+        links.append(('prev-archive', feed_url(f'{ARCHIVE_DIR}/{name}', name)))
+    if number < latest:
+        name = archive_page_name(number + 1)
+        links.append(('next-archive', feed_url(f'{ARCHIVE_DIR}/{name}', name)))
+    path = os.path.join(ARCHIVE_DIR, archive_page_name(number))
+    tmp_file = path + '.tmp'
+    with open(tmp_file, 'wb') as f:
+        f.write(render_feed(sort_records(records), links, archive=True))
+    os.replace(tmp_file, path)
+    print(f"归档页已保存到：{path}")
+
+def load_archived_guids():
+    """读取已归档条目的GUID；索引丢失时从归档页重建"""
+    if os.path.exists(ARCHIVE_INDEX):
+        with open(ARCHIVE_INDEX, 'r', encoding='utf-8') as f:
+            return {line.strip() for line in f if line.strip()}
+    guids = set()
+    for number in list_archive_pages():
+        page = import_feed_items(os.path.join(ARCHIVE_DIR, archive_page_name(number)))
+        guids.update(record['guid'] for record in page)
+    if guids:
+        append_archived_guids(guids)
+    return guids
+
+def append_archived_guids(guids):
+    """将GUID追加到归档索引"""
+    os.makedirs(os.path.dirname(ARCHIVE_INDEX) or '.', exist_ok=True)
+    with open(ARCHIVE_INDEX, 'a', encoding='utf-8') as f:
+        for guid in guids:
+            f.write(guid + '\n')
+
+def archive_records(overflow):
+    """将移出主feed的条目追加到最新的归档页，写满后开启新页，返回最新页码"""
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    pages = list_archive_pages()
+    number = pages[-1] if pages else 1
+    # 只读取最新一页，已写满的旧页保持不变
+    page = import_feed_items(os.path.join(ARCHIVE_DIR, archive_page_name(number)))
+    page_guids = {record['guid'] for record in page}
+    changed = {number: page}
+    for record in reversed(overflow):  # 从最旧的条目开始追加
+        if record['guid'] in page_guids:
+            continue
+        if len(page) >= ARCHIVE_PAGE_SIZE:
+            number += 1
+            page = []
+            changed[number] = page
+        page.append(record)
+        page_guids.add(record['guid'])
+    for page_number, records in changed.items():
+        write_archive_page(page_number, records, number)
+    append_archived_guids(record['guid'] for record in overflow)
+    print(f"已将{len(overflow)}个条目移入归档")
+    return number
+
+def latest_archive_links(latest):
+    """主feed指向最新归档页的 prev-archive 链接"""
+    if not latest:
+        return []
+    name = archive_page_name(latest)
+    return [('prev-archive', feed_url(f'{ARCHIVE_DIR}/{name}', f'{ARCHIVE_DIR}/{name}'))]
+
+def update_feed_incremental():
+    """增量更新feed：只渲染新的综述条目，旧条目直接复用存储中的片段"""
+    records = load_feed_store()
+    known_guids = {record['guid'] for record in records} | load_archived_guids()
+    
+    added = 0
+    for file_path in get_brief_files():
+        guid = BRIEF_URL_PREFIX + file_path.stem
+        if guid in known_guids:
+            continue
+        try:
+            brief = parse_brief_content(file_path)
+            records.append({
+                'guid': guid,
+                'date': brief['date'].isoformat(),
+                'xml': render_item(guid, brief['title'], guid, brief['content'], brief['date'])
+            })
+            known_guids.add(guid)
+            added += 1
+            print(f"已添加新文章：{brief['title']}")
+        except Exception as e:
+            print(f"处理文件 {file_path} 时出错：{str(e)}")
+    
+    sort_records(records)
+    pages = list_archive_pages()
+    latest = pages[-1] if pages else 0
+    # 预留归档链接的空间后，按条目数和字节预算保留最新条目
+    header_size = len(render_feed([], latest_archive_links(latest + 1)))
+    records, overflow = split_retained(records, header_size)
+    
+    if not added and not overflow and os.path.exists(FEED_STORE) and os.path.exists(FEED_FILE):
+        print("没有新的综述，feed无需更新")
+        return False
+    
+    if overflow:
+        latest = archive_records(overflow)
+    save_feed_store(records)
+    write_feed(render_feed(records, latest_archive_links(latest)))
+    return True
+
+def update_feed():
+    """按配置的模式更新RSS feed"""
+    if FEED_MODE == 'full':
+        fg = generate_feed()
+        save_feed(fg)
+        return True
+    return update_feed_incremental()
+
 def main():
     """主函数"""
     try:
         print("开始生成RSS feed")
-        fg = generate_feed()
-        save_feed(fg)
+        update_feed()
         print("RSS feed生成完成")
     except Exception as e:
         print(f"程序运行出错：{str(e)}")
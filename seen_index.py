@@ -0,0 +1,96 @@
+import datetime
+import hashlib
+import os
+import sqlite3
+import threading
+from urllib.parse import urlsplit, urlunsplit
+
+# 已处理文章索引的SQLite数据库路径
+SEEN_INDEX_DB = os.environ.get("SEEN_INDEX_DB", "state/seen_articles.db")
+
+
+def normalize_url(url):
+    """去掉查询参数和片段（如 ?utm_source=feed），作为文章的稳定键"""
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme, parts.netloc.lower(), parts.path, '', ''))
+
+
+def content_hash(content):
+    """计算文章正文的哈希"""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+class SeenIndex:
+    """跨运行持久化的已处理文章索引，按URL和GUID去重，按正文哈希判断是否有更新"""
+
+    def __init__(self, path=None):
+        self.path = path or SEEN_INDEX_DB
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._conn:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS seen_articles (
+                    url TEXT PRIMARY KEY,
+                    guid TEXT,
+                    updated TEXT,
+                    content_hash TEXT,
+                    first_seen TEXT,
+                    last_seen TEXT
+                )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_seen_guid ON seen_articles (guid)")
+
+    def close(self):
+        self._conn.close()
+
+    def _lookup(self, entry):
+        row = self._conn.execute(
+            "SELECT updated, content_hash FROM seen_articles WHERE url = ? OR guid = ? LIMIT 1",
+            (normalize_url(entry['link']), entry.get('id') or entry['link'])
+        ).fetchone()
+        return row
+
+    def filter_new(self, entries):
+        """返回未处理过、或源中updated时间有变化的文章"""
+        result = []
+        with self._lock:
+            for entry in entries:
+                row = self._lookup(entry)
+                if row is None or (entry.get('updated') and entry['updated'] != row[0]):
+                    result.append(entry)
+        skipped = len(entries) - len(result)
+        if skipped:
+            print(f"已跳过 {skipped} 篇处理过的文章")
+        return result
+
+    def has_changed(self, entry, content):
+        """正文与上次处理时不同（或从未处理过）时返回True"""
+        with self._lock:
+            row = self._lookup(entry)
+        return row is None or row[1] != content_hash(content)
+
+    def touch(self, entry):
+        """正文未变化时记录源中新的updated时间，避免之后每次运行都重新下载该文章"""
+        now = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE seen_articles SET updated = ?, last_seen = ? WHERE url = ? OR guid = ?",
+                (entry.get('updated'), now, normalize_url(entry['link']), entry.get('id') or entry['link'])
+            )
+
+    def mark_seen(self, entry, content):
+        """记录文章已处理"""
+        now = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        with self._lock, self._conn:
+            self._conn.execute(
+                """INSERT INTO seen_articles (url, guid, updated, content_hash, first_seen, last_seen)
+                   VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(url) DO UPDATE SET
+                       guid = excluded.guid,
+                       updated = excluded.updated,
+                       content_hash = excluded.content_hash,
+                       last_seen = excluded.last_seen""",
+                (normalize_url(entry['link']), entry.get('id') or entry['link'],
+                 entry.get('updated'), content_hash(content), now, now)
+            )
@@ -0,0 +1,163 @@
+import datetime
+import json
+import logging
+import os
+import threading
+import time
+
+import github_sync
+from retry_policy import RetryPolicy
+
+# 待同步任务的持久化文件，进程重启后继续同步
+SYNC_OUTBOX_FILE = os.environ.get("SYNC_OUTBOX_FILE", "state/sync_outbox.json")
+# 同步失败后的重试退避（全抖动）：基础与最大等待秒数；失败不会丢弃，直到同步成功
+SYNC_RETRY_BASE_DELAY = float(os.environ.get("SYNC_RETRY_BASE_DELAY", "30"))
+SYNC_RETRY_MAX_DELAY = float(os.environ.get("SYNC_RETRY_MAX_DELAY", "1800"))
+
+logger = logging.getLogger("sync_outbox")
+
+
+def merge_paths(current, new):
+    """合并两次同步的路径，None 表示全部同步路径"""
+    if current is None or new is None:
+        return None
+    return sorted(set(current) | set(new))
+
+
+class SyncOutbox:
+    """持久化的待同步队列
+
+    同步总是推送磁盘上的最新内容，因此多次待同步请求会合并为一个任务（路径取并集），
+    旧版本的feed不会被单独推送。失败后在后台线程中按退避时间重试。
+    """
+
+    def __init__(self, path=None, sync_func=None, policy=None):
+        self.path = path or SYNC_OUTBOX_FILE
+        self.sync_func = sync_func or github_sync.sync_to_github
+        self.policy = policy or RetryPolicy(base_delay=SYNC_RETRY_BASE_DELAY, max_delay=SYNC_RETRY_MAX_DELAY,
+                                            deadline=None)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f).get('pending')
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.error(f"读取同步队列失败: {str(e)}")
+            return None
+
+    def _save(self, pending):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'pending': pending}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def pending(self):
+        """返回当前待同步的任务，没有时返回None"""
+        with self._lock:
+            return self._load()
+
+    def enqueue(self, paths=None, message=None):
+        """加入一次待同步请求，与尚未完成的任务合并，并唤醒后台线程立即尝试"""
+        if self.sync_func is github_sync.sync_to_github and not github_sync.is_configured():
+            return None
+        now = time.time()
+        with self._lock:
+            pending = self._load()
+            if pending is None:
+                pending = {'paths': paths, 'message': message, 'enqueued_at': now, 'version': 1,
+                           'attempts': 0, 'next_attempt_at': now, 'last_error': None, 'coalesced': 0}
+            else:
+                pending['paths'] = merge_paths(pending.get('paths'), paths)
+                pending['message'] = message or pending.get('message')
+                pending['coalesced'] = pending.get('coalesced', 0) + 1
+                pending['version'] = pending.get('version', 0) + 1
+                # 有新的内容时立即重试，不必等待上一次失败的退避时间
+                pending['next_attempt_at'] = now
+            self._save(pending)
+        self._wakeup.set()
+        return pending
+
+    def flush(self, force=False):
+        """执行待同步任务（force 时忽略退避时间），成功或没有任务时返回True"""
+        with self._flush_lock:
+            pending = self.pending()
+            if pending is None:
+                return True
+            if not force and pending.get('next_attempt_at', 0) > time.time():
+                return False
+            # 同步期间不持有队列锁，新的请求可以继续加入
+            try:
+                success = self.sync_func(pending.get('paths'), pending.get('message'))
+                error = None if success else '同步失败'
+            except Exception as e:
+                success, error = False, str(e)
+
+            with self._lock:
+                current = self._load()
+                if current is None or current.get('version') != pending.get('version'):
+                    # 同步期间有新的请求，保留合并后的任务，立即再同步一次
+                    return success
+                if success:
+                    self._save(None)
+                    logger.info(f"同步完成（合并了 {pending.get('coalesced', 0) + 1} 次请求，"
+                                f"尝试 {pending.get('attempts', 0) + 1} 次）")
+                    return True
+                attempt = current.get('attempts', 0)
+                # 退避指数封顶，避免长时间离线后指数溢出
+                delay = self.policy.backoff(min(attempt, 16))
+                current['attempts'] = attempt + 1
+                current['last_error'] = error
+                current['next_attempt_at'] = time.time() + delay
+                self._save(current)
+            retry_at = datetime.datetime.fromtimestamp(current['next_attempt_at']).strftime('%H:%M:%S')
+            logger.warning(f"同步失败（第 {attempt + 1} 次）: {error}，{delay:.0f} 秒后重试（{retry_at}）")
+            return False
+
+    def _next_wait(self):
+        pending = self.pending()
+        if pending is None:
+            return None
+        return max(0.0, pending.get('next_attempt_at', 0) - time.time())
+
+    def _run(self):
+        while not self._stopped.is_set():
+            wait = self._next_wait()
+            if wait is None or wait > 0:
+                self._wakeup.wait(wait)
+                self._wakeup.clear()
+                continue
+            self.flush()
+
+    def start(self):
+        """启动后台同步线程（进程重启后会继续执行上次未完成的任务）"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name='sync-outbox', daemon=True)
+            self._thread.start()
+        self._wakeup.set()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+
+_outbox = None
+
+
+def get_outbox():
+    """返回进程内共享的同步队列"""
+    global _outbox
+    if _outbox is None:
+        _outbox = SyncOutbox()
+    return _outbox
@@ -0,0 +1,41 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import fake_github  # noqa: E402
+import github_sync  # noqa: E402
+
+TOKEN = 'test-token'
+
+
+def write(path, content):
+    """在当前目录下写入文件（自动创建父目录）"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """在临时目录中准备 feed.xml 和一份简报"""
+    monkeypatch.chdir(tmp_path)
+    write('feed.xml', '<rss>feed</rss>\n')
+    write(os.path.join('dailybrief', '20250408.md'), '# brief\n')
+    return tmp_path
+
+
+@pytest.fixture
+def github(workdir, monkeypatch):
+    """启动模拟的 GitHub API，并让 github_sync 指向它"""
+    with fake_github.FakeGitHub(token=TOKEN) as server:
+        monkeypatch.setattr(github_sync, 'GITHUB_API_URL', server.url)
+        monkeypatch.setattr(github_sync, 'GIT_TOKEN', TOKEN)
+        monkeypatch.setattr(github_sync, 'GIT_REPO_URL', server.repo_url)
+        monkeypatch.setattr(github_sync, 'OWNER', server.owner)
+        monkeypatch.setattr(github_sync, 'REPO', server.repo)
+        monkeypatch.setattr(github_sync, 'GIT_BRANCH', server.branch)
+        yield server
@@ -0,0 +1,68 @@
+import datetime
+
+import atlantic_rss_reader
+
+SINCE = datetime.datetime(2025, 4, 8, tzinfo=datetime.timezone.utc)
+
+
+def atom_entry(name, published, updated=None):
+    updated_xml = f'<updated>{updated}</updated>' if updated else ''
+    return (f'<entry><id>urn:{name}</id><title>{name}</title><published>{published}</published>{updated_xml}'
+            f'<link rel="alternate" href="https://example.com/{name}"/><summary>{name}</summary></entry>')
+
+
+def atom_feed(*entries):
+    return '<feed xmlns="http://www.w3.org/2005/Atom">' + ''.join(entries) + '</feed>'
+
+
+def titles(entries):
+    return [entry['title'] for entry in entries]
+
+
+def test_iter_entries_parses_all_entries_without_watermark():
+    xml = atom_feed(atom_entry('a', '2025-04-08T12:00:00Z'), atom_entry('b', '2025-04-07T12:00:00Z', '2025-04-07T13:00:00Z'))
+    entries = list(atlantic_rss_reader.iter_entries(xml))
+
+    assert titles(entries) == ['a', 'b']
+    assert entries[1]['link'] == 'https://example.com/b'
+    assert entries[1]['id'] == 'urn:b'
+    assert entries[1]['updated'] == '2025-04-07T13:00:00Z'
+
+
+def test_iter_entries_keeps_updated_and_out_of_order_entries(monkeypatch):
+    monkeypatch.setattr(atlantic_rss_reader, 'READER_STALE_LIMIT', 3)
+    xml = atom_feed(
+        atom_entry('new', '2025-04-08T12:00:00Z'),
+        # 旧文章但在水位之后更新过
+        atom_entry('updated', '2025-04-06T12:00:00Z', '2025-04-08T06:00:00Z'),
+        atom_entry('old', '2025-04-06T10:00:00Z'),
+        # 排在旧文章之后的新文章
+        atom_entry('late', '2025-04-08T08:00:00Z'),
+        atom_entry('old2', '2025-04-05T10:00:00Z'),
+        atom_entry('old3', '2025-04-04T10:00:00Z'),
+        atom_entry('old4', '2025-04-03T10:00:00Z'),
+        # 连续3篇旧文章后停止解析
+        atom_entry('beyond', '2025-04-08T09:00:00Z'),
+    )
+
+    assert titles(atlantic_rss_reader.iter_entries(xml, since=SINCE)) == ['new', 'updated', 'late']
+
+
+def test_update_watermark_stops_before_oldest_failed_entry(workdir):
+    entries = [{'published': f'2025-04-08T1{hour}:00:00Z'} for hour in range(5)]
+
+    watermark = atlantic_rss_reader.update_watermark(entries, failed=[entries[3], entries[2]])
+
+    assert watermark == datetime.datetime(2025, 4, 8, 11, tzinfo=datetime.timezone.utc)
+    assert atlantic_rss_reader.load_watermark() == watermark
+    # 失败的文章是最早的一篇时水位不动
+    assert atlantic_rss_reader.update_watermark(entries, failed=[entries[0]]) is None
+    assert atlantic_rss_reader.load_watermark() == watermark
+
+
+def test_update_watermark_uses_updated_time_and_never_moves_back(workdir):
+    entries = [{'published': '2025-04-06T12:00:00Z', 'updated': '2025-04-08T12:00:00Z'}]
+    assert atlantic_rss_reader.update_watermark(entries) == datetime.datetime(2025, 4, 8, 12, tzinfo=datetime.timezone.utc)
+
+    atlantic_rss_reader.update_watermark([{'published': '2025-04-07T12:00:00Z'}])
+    assert atlantic_rss_reader.load_watermark() == datetime.datetime(2025, 4, 8, 12, tzinfo=datetime.timezone.utc)
@@ -0,0 +1,73 @@
+import gzip
+import importlib
+import os
+
+import pytest
+
+import feed_cache
+from conftest import write
+
+
+@pytest.fixture
+def client(workdir, monkeypatch):
+    """只提供HTTP服务的Flask测试客户端，feed缓存指向临时目录中的 feed.xml"""
+    monkeypatch.setenv('RUN_MODE', 'web')
+    app = importlib.import_module('app')
+    monkeypatch.setattr(app, 'feed_cache', feed_cache.FeedCache('feed.xml', check_interval=0))
+    return app.app.test_client()
+
+
+def test_feed_cache_reloads_when_file_is_replaced(workdir):
+    cache = feed_cache.FeedCache('feed.xml', check_interval=0)
+    first = cache.get()
+    assert first.body == b'<rss>feed</rss>\n'
+    assert cache.get() is first
+
+    write('feed.xml', '<rss>newer feed</rss>\n')
+    second = cache.get()
+    assert second.body == b'<rss>newer feed</rss>\n'
+    assert second.etag != first.etag
+
+
+def test_feed_cache_returns_none_for_missing_file(workdir):
+    assert feed_cache.FeedCache('missing.xml').get() is None
+
+
+def test_feed_returns_etag_and_304_when_unchanged(client):
+    response = client.get('/feed.xml')
+    assert response.status_code == 200
+    assert response.data == b'<rss>feed</rss>\n'
+    etag = response.headers['ETag']
+    last_modified = response.headers['Last-Modified']
+
+    response = client.get('/feed.xml', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+
+    response = client.get('/feed.xml', headers={'If-Modified-Since': last_modified})
+    assert response.status_code == 304
+
+
+def test_feed_returns_new_body_after_update(client):
+    etag = client.get('/feed.xml').headers['ETag']
+
+    write('feed.xml', '<rss>newer feed</rss>\n')
+    # 保证修改时间前进，避免 If-Modified-Since 精度问题
+    os.utime('feed.xml', (os.path.getmtime('feed.xml') + 5,) * 2)
+    response = client.get('/feed.xml', headers={'If-None-Match': etag})
+
+    assert response.status_code == 200
+    assert response.data == b'<rss>newer feed</rss>\n'
+    assert response.headers['ETag'] != etag
+
+
+def test_gzip_representation_has_its_own_etag(client):
+    plain = client.get('/feed.xml')
+    response = client.get('/feed.xml', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.data) == b'<rss>feed</rss>\n'
+    assert response.headers['ETag'] != plain.headers['ETag']
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert client.get('/feed.xml', headers={'Accept-Encoding': 'gzip',
+                                            'If-None-Match': response.headers['ETag']}).status_code == 304
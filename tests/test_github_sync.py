@@ -0,0 +1,100 @@
+import github_sync
+from conftest import write
+
+
+def local_files():
+    files = {}
+    for repo_path, local_path in github_sync.collect_sync_files().items():
+        with open(local_path, 'rb') as f:
+            files[repo_path] = f.read()
+    return files
+
+
+def test_sync_to_github_commits_all_files_once(github):
+    commits = len(github.repository.commits)
+
+    assert github_sync.sync_to_github()
+
+    assert github.repository.files() == local_files()
+    assert len(github.repository.commits) == commits + 1
+
+
+def test_sync_to_github_skips_commit_when_blob_shas_match(github):
+    assert github_sync.sync_to_github()
+    commits = len(github.repository.commits)
+    github.reset_requests()
+
+    assert github_sync.sync_to_github()
+
+    assert len(github.repository.commits) == commits
+    # 只读取 ref、提交和文件树
+    assert [method for method, _ in github.requests] == ['GET', 'GET', 'GET']
+
+
+def test_sync_to_github_uploads_only_changed_files(github):
+    assert github_sync.sync_to_github()
+    write('feed.xml', '<rss>updated</rss>\n')
+    github.reset_requests()
+
+    assert github_sync.sync_to_github()
+
+    assert github.repository.files()['feed.xml'] == b'<rss>updated</rss>\n'
+    assert ('POST', '/repos/owner/repo/git/blobs') not in github.requests
+
+
+def test_sync_to_github_rebases_when_branch_moves(github):
+    # 更新 ref 前插入一个外部提交，PATCH 返回 422（非快进）
+    github.conflict_next = 1
+
+    assert github_sync.sync_to_github()
+
+    remote = github.repository.files()
+    assert 'CONFLICT.txt' in remote
+    assert remote['feed.xml'] == local_files()['feed.xml']
+    assert [path for method, path in github.requests if method == 'PATCH'] == [
+        '/repos/owner/repo/git/refs/heads/main'] * 2
+
+
+def test_sync_to_github_gives_up_after_rebase_attempts(github, monkeypatch):
+    monkeypatch.setattr(github_sync, 'SYNC_REBASE_ATTEMPTS', 2)
+    github.conflict_next = 2
+
+    assert not github_sync.sync_to_github()
+    assert 'feed.xml' not in github.repository.files()
+
+
+def test_sync_to_github_reports_server_errors(github):
+    github.fail_next = 1
+
+    assert not github_sync.sync_to_github()
+
+
+def test_sync_feed_skips_push_when_sha_matches(github):
+    with open('feed.xml', 'rb') as f:
+        github.repository.write_files({'feed.xml': f.read()})
+    github.reset_requests()
+
+    assert github_sync.sync_feed_to_github()
+
+    assert [method for method, _ in github.requests] == ['GET']
+
+
+def test_sync_feed_retries_after_409_conflict(github):
+    github.repository.write_files({'feed.xml': b'<rss>old</rss>\n'})
+    # PUT 前远程 feed.xml 被其他提交更新，携带的旧 SHA 返回 409
+    github.conflict_next = 1
+
+    assert github_sync.sync_feed_to_github()
+
+    assert github.repository.files()['feed.xml'] == b'<rss>feed</rss>\n'
+    assert [method for method, _ in github.requests].count('PUT') == 2
+
+
+def test_sync_feed_retries_after_422_when_file_appears(github):
+    # 远程原本没有 feed.xml，PUT 前被其他提交创建，不带 SHA 的 PUT 返回 422
+    github.conflict_next = 1
+
+    assert github_sync.sync_feed_to_github()
+
+    assert github.repository.files()['feed.xml'] == b'<rss>feed</rss>\n'
+    assert [method for method, _ in github.requests].count('PUT') == 2
@@ -0,0 +1,77 @@
+import random
+import threading
+import time
+
+import pytest
+
+import pipeline
+
+
+def test_pipeline_keeps_input_order_for_ordered_stages():
+    seen = []
+
+    def slow_square(value):
+        # 让并发阶段乱序完成
+        time.sleep(random.uniform(0, 0.01))
+        return value * value
+
+    stages = [
+        pipeline.Stage('square', slow_square, workers=4),
+        pipeline.Stage('collect', lambda value: seen.append(value) or value, ordered=True),
+    ]
+    result = pipeline.Pipeline(stages, queue_size=2).run(range(30))
+
+    assert result == [value * value for value in range(30)]
+    assert seen == result
+
+
+def test_pipeline_drops_none_and_counts_optional_stage_errors():
+    def check(value):
+        if value == 3:
+            raise ValueError('bad item')
+        return value if value % 2 == 0 else None
+
+    stages = [pipeline.Stage('check', check, workers=2), pipeline.Stage('keep', lambda value: value, ordered=True)]
+    runner = pipeline.Pipeline(stages)
+    assert runner.run(range(8)) == [0, 2, 4, 6]
+
+    report = runner.report()
+    assert report['error'] is None
+    assert report['errors'] == 1
+    check_stage = report['stages']['check']
+    assert check_stage['items'] == 8
+    assert check_stage['output'] == 4
+    assert check_stage['dropped'] == 3
+    # 被丢弃的元素不会交给下游阶段处理
+    assert report['stages']['keep']['items'] == 4
+
+
+def test_required_stage_failure_aborts_pipeline():
+    processed = []
+    lock = threading.Lock()
+
+    def store(value):
+        if value == 2:
+            raise RuntimeError('disk full')
+        with lock:
+            processed.append(value)
+        return value
+
+    stages = [
+        pipeline.Stage('fetch', lambda value: value, workers=2),
+        pipeline.Stage('store', store, ordered=True, required=True),
+    ]
+    runner = pipeline.Pipeline(stages, queue_size=1)
+    with pytest.raises(pipeline.PipelineError, match='disk full'):
+        runner.run(range(100))
+
+    assert processed == [0, 1]
+    report = runner.report()
+    assert report['error'].startswith('阶段 store 处理失败')
+    # 失败后停止读入，已读入的元素不再处理
+    assert report['stages']['store']['items'] + report['stages']['store']['skipped'] < 100
+
+
+def test_ordered_stage_requires_single_worker():
+    with pytest.raises(ValueError):
+        pipeline.Stage('store', lambda value: value, workers=2, ordered=True)
@@ -0,0 +1,108 @@
+import datetime
+import threading
+from email.utils import format_datetime
+
+from retry_policy import CircuitBreaker, RetryPolicy, parse_retry_after
+
+
+class FakeResponse:
+    def __init__(self, headers=None):
+        self.headers = headers or {}
+
+
+def test_parse_retry_after_accepts_seconds_and_http_dates():
+    assert parse_retry_after('30') == 30.0
+    assert parse_retry_after(' 7 ') == 7.0
+    later = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=60)
+    assert 55 <= parse_retry_after(format_datetime(later, usegmt=True)) <= 60
+    # 已经过去的日期不会得到负数
+    earlier = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=60)
+    assert parse_retry_after(format_datetime(earlier, usegmt=True)) == 0.0
+
+
+def test_parse_retry_after_rejects_missing_or_invalid_values():
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('') is None
+    assert parse_retry_after('soon') is None
+
+
+def test_backoff_is_jittered_within_capped_exponential_bound():
+    policy = RetryPolicy(base_delay=2.0, max_delay=10.0)
+    for attempt, bound in [(0, 2.0), (1, 4.0), (2, 8.0), (3, 10.0), (10, 10.0)]:
+        delays = [policy.backoff(attempt) for _ in range(200)]
+        assert all(0 <= delay <= bound for delay in delays)
+
+
+def test_next_delay_prefers_retry_after_header():
+    policy = RetryPolicy(base_delay=100.0, max_delay=100.0)
+    assert policy.next_delay(0, FakeResponse({'Retry-After': '3'})) == 3.0
+    assert 0 <= policy.next_delay(0, FakeResponse({'Retry-After': 'soon'})) <= 100.0
+    assert 0 <= policy.next_delay(0) <= 100.0
+
+
+def test_retryable_statuses_and_deadline():
+    policy = RetryPolicy(deadline=10.0)
+    assert policy.is_retryable(429) and policy.is_retryable(503)
+    assert not policy.is_retryable(400) and not policy.is_retryable(404)
+    deadline = policy.start()
+    assert policy.within_deadline(deadline, 1.0)
+    assert not policy.within_deadline(deadline, 60.0)
+    assert RetryPolicy(deadline=None).within_deadline(None, 1e9)
+
+
+def test_circuit_breaker_opens_after_threshold(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr('retry_policy.time.monotonic', lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30.0)
+
+    breaker.record_failure()
+    assert breaker.state == 'closed' and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open' and not breaker.allow()
+
+    now[0] += 30.0
+    assert breaker.state == 'half-open'
+
+
+def test_circuit_breaker_allows_single_half_open_probe(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr('retry_policy.time.monotonic', lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30.0)
+    breaker.record_failure()
+    now[0] += 30.0
+
+    assert breaker.allow()
+    # 探测进行中，其他线程的请求被拒绝
+    others = []
+    thread = threading.Thread(target=lambda: others.append(breaker.allow()))
+    thread.start()
+    thread.join()
+    assert others == [False]
+    assert not breaker.allow()
+
+    # 探测失败后重新熔断
+    breaker.record_failure()
+    assert breaker.state == 'open' and not breaker.allow()
+
+    now[0] += 30.0
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed' and breaker.allow()
+
+
+def test_circuit_breaker_release_returns_probe_only_from_owner(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr('retry_policy.time.monotonic', lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30.0)
+    breaker.record_failure()
+    now[0] += 30.0
+    assert breaker.allow()
+
+    # 非探测线程的 release 不会归还名额
+    thread = threading.Thread(target=breaker.release)
+    thread.start()
+    thread.join()
+    assert not breaker.allow()
+
+    breaker.release()
+    assert breaker.allow()
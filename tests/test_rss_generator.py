@@ -0,0 +1,56 @@
+import rss_generator
+
+
+def records(*sizes):
+    """按降序排列的条目，每条的 xml 为指定字节数"""
+    return [{'guid': f'item-{index}', 'xml': 'x' * size} for index, size in enumerate(sizes)]
+
+
+def test_split_retained_keeps_everything_within_budgets(monkeypatch):
+    monkeypatch.setattr(rss_generator, 'MAX_ENTRIES', 5)
+    monkeypatch.setattr(rss_generator, 'MAX_FEED_BYTES', 10_000)
+    items = records(100, 100, 100)
+
+    assert rss_generator.split_retained(items, header_size=200) == (items, [])
+
+
+def test_split_retained_limits_entry_count(monkeypatch):
+    monkeypatch.setattr(rss_generator, 'MAX_ENTRIES', 2)
+    monkeypatch.setattr(rss_generator, 'MAX_FEED_BYTES', 10_000)
+    items = records(100, 100, 100, 100)
+
+    retained, archived = rss_generator.split_retained(items, header_size=200)
+    assert retained == items[:2]
+    assert archived == items[2:]
+
+
+def test_split_retained_limits_bytes(monkeypatch):
+    monkeypatch.setattr(rss_generator, 'MAX_ENTRIES', 50)
+    # 头部100字节，每条100字节加5字节的换行缩进
+    monkeypatch.setattr(rss_generator, 'MAX_FEED_BYTES', 100 + 3 * 105)
+    items = records(100, 100, 100, 100, 100)
+
+    retained, archived = rss_generator.split_retained(items, header_size=100)
+    assert retained == items[:3]
+    assert archived == items[3:]
+
+
+def test_split_retained_keeps_at_least_one_oversized_entry(monkeypatch):
+    monkeypatch.setattr(rss_generator, 'MAX_ENTRIES', 50)
+    monkeypatch.setattr(rss_generator, 'MAX_FEED_BYTES', 500)
+    items = records(2_000, 100)
+
+    retained, archived = rss_generator.split_retained(items, header_size=100)
+    assert retained == items[:1]
+    assert archived == items[1:]
+
+
+def test_split_retained_counts_utf8_bytes(monkeypatch):
+    monkeypatch.setattr(rss_generator, 'MAX_ENTRIES', 50)
+    monkeypatch.setattr(rss_generator, 'MAX_FEED_BYTES', 100)
+    # 每个汉字占3字节
+    items = [{'guid': 'a', 'xml': '文' * 10}, {'guid': 'b', 'xml': '章' * 10}]
+
+    retained, archived = rss_generator.split_retained(items, header_size=50)
+    assert retained == items[:1]
+    assert archived == items[1:]
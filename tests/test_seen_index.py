@@ -0,0 +1,59 @@
+import pytest
+
+import seen_index
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = seen_index.SeenIndex(str(tmp_path / 'seen.db'))
+    yield index
+    index.close()
+
+
+def entry(link, guid=None, updated='2025-04-08T12:00:00Z'):
+    return {'link': link, 'id': guid, 'updated': updated}
+
+
+def test_filter_new_skips_seen_urls_ignoring_query(index):
+    seen = entry('https://example.com/a?utm_source=feed')
+    index.mark_seen(seen, 'body')
+
+    fresh = entry('https://example.com/b')
+    same_url = entry('https://EXAMPLE.com/a#top')
+    assert index.filter_new([fresh, same_url]) == [fresh]
+
+
+def test_filter_new_matches_guid_when_url_changes(index):
+    index.mark_seen(entry('https://example.com/a', guid='urn:a'), 'body')
+
+    assert index.filter_new([entry('https://example.com/a-renamed', guid='urn:a')]) == []
+
+
+def test_filter_new_returns_entries_whose_updated_time_changed(index):
+    index.mark_seen(entry('https://example.com/a'), 'body')
+    changed = entry('https://example.com/a', updated='2025-04-09T12:00:00Z')
+
+    assert index.filter_new([changed]) == [changed]
+    # 源中没有updated时只按URL去重
+    assert index.filter_new([entry('https://example.com/a', updated=None)]) == []
+
+
+def test_has_changed_compares_content_hash(index):
+    article = entry('https://example.com/a')
+    assert index.has_changed(article, 'body')
+
+    index.mark_seen(article, 'body')
+    assert not index.has_changed(article, 'body')
+    assert index.has_changed(article, 'new body')
+
+
+def test_touch_records_new_updated_time_for_unchanged_content(index):
+    index.mark_seen(entry('https://example.com/a'), 'body')
+    updated = entry('https://example.com/a', updated='2025-04-09T12:00:00Z')
+    assert index.filter_new([updated]) == [updated]
+    assert not index.has_changed(updated, 'body')
+
+    index.touch(updated)
+
+    assert index.filter_new([updated]) == []
+    assert not index.has_changed(updated, 'body')
@@ -0,0 +1,146 @@
+import os
+import time
+
+import github_sync
+import sync_outbox
+from retry_policy import RetryPolicy
+
+
+class Recorder:
+    """记录同步调用的假同步函数，可以指定每次调用的结果"""
+
+    def __init__(self, *results, during=None):
+        self.results = list(results)
+        self.calls = []
+        self.during = during
+
+    def __call__(self, paths, message):
+        self.calls.append((paths, message))
+        if self.during is not None:
+            self.during()
+        result = self.results.pop(0) if self.results else True
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def make_outbox(tmp_path, sync_func, delay=10.0):
+    policy = RetryPolicy(base_delay=delay, max_delay=delay, deadline=None)
+    # 固定退避时间，便于断言 next_attempt_at
+    policy.backoff = lambda attempt: delay
+    return sync_outbox.SyncOutbox(path=str(tmp_path / 'outbox.json'), sync_func=sync_func, policy=policy)
+
+
+def test_enqueue_coalesces_requests_into_one_task(tmp_path):
+    outbox = make_outbox(tmp_path, Recorder())
+
+    outbox.enqueue(['feed.xml'], 'first')
+    pending = outbox.enqueue(['dailybrief', 'feed.xml'])
+
+    assert pending['paths'] == ['dailybrief', 'feed.xml']
+    assert pending['message'] == 'first'
+    assert pending['coalesced'] == 1
+    assert pending['version'] == 2
+    # None 表示同步全部路径，合并后仍为全部
+    assert outbox.enqueue(None)['paths'] is None
+
+
+def test_flush_syncs_merged_task_once_and_clears_it(tmp_path):
+    recorder = Recorder()
+    outbox = make_outbox(tmp_path, recorder)
+    for index in range(5):
+        outbox.enqueue(['feed.xml'], f'update {index}')
+
+    assert outbox.flush()
+
+    assert recorder.calls == [(['feed.xml'], 'update 4')]
+    assert outbox.pending() is None
+
+
+def test_enqueue_during_flush_keeps_newer_version(tmp_path):
+    outbox = make_outbox(tmp_path, None)
+    recorder = Recorder(during=lambda: outbox.enqueue(['articles']))
+    outbox.sync_func = recorder
+    outbox.enqueue(['feed.xml'])
+
+    assert outbox.flush()
+
+    # 同步期间加入的请求没有被当作已完成丢弃
+    pending = outbox.pending()
+    assert pending['version'] == 2
+    assert pending['paths'] == ['articles', 'feed.xml']
+    assert pending['attempts'] == 0
+
+    recorder.during = None
+    assert outbox.flush()
+    assert outbox.pending() is None
+    assert len(recorder.calls) == 2
+
+
+def test_failed_flush_schedules_backoff(tmp_path):
+    recorder = Recorder(False, RuntimeError('boom'), True)
+    outbox = make_outbox(tmp_path, recorder, delay=10.0)
+    outbox.enqueue(['feed.xml'])
+
+    before = time.time()
+    assert not outbox.flush()
+    pending = outbox.pending()
+    assert pending['attempts'] == 1
+    assert pending['last_error'] == '同步失败'
+    assert before + 10.0 <= pending['next_attempt_at'] <= time.time() + 10.0
+
+    # 退避时间未到时不同步
+    assert not outbox.flush()
+    assert len(recorder.calls) == 1
+
+    assert not outbox.flush(force=True)
+    pending = outbox.pending()
+    assert pending['attempts'] == 2
+    assert pending['last_error'] == 'boom'
+
+    assert outbox.flush(force=True)
+    assert outbox.pending() is None
+
+
+def test_enqueue_after_failure_retries_immediately(tmp_path):
+    recorder = Recorder(False, True)
+    outbox = make_outbox(tmp_path, recorder, delay=3600.0)
+    outbox.enqueue(['feed.xml'])
+    assert not outbox.flush()
+
+    pending = outbox.enqueue(['dailybrief'])
+
+    assert pending['next_attempt_at'] <= time.time()
+    assert pending['attempts'] == 1
+    assert outbox.flush()
+    assert recorder.calls[-1][0] == ['dailybrief', 'feed.xml']
+
+
+def test_outbox_syncs_to_fake_github_after_outage(github, tmp_path):
+    path = str(tmp_path / 'state' / 'outbox.json')
+    policy = RetryPolicy(base_delay=0.01, max_delay=0.01, deadline=None)
+    outbox = sync_outbox.SyncOutbox(path=path, policy=policy)
+    github.fail_next = 10 ** 6
+    for index in range(3):
+        outbox.enqueue(['feed.xml'], f'offline {index}')
+        assert not outbox.flush(force=True)
+    assert outbox.pending()['attempts'] == 3
+
+    # 进程重启后从持久化文件继续
+    github.fail_next = 0
+    restarted = sync_outbox.SyncOutbox(path=path, policy=policy)
+    commits = len(github.repository.commits)
+    assert restarted.flush(force=True)
+
+    assert restarted.pending() is None
+    assert len(github.repository.commits) == commits + 1
+    assert github.repository.files()['feed.xml'] == b'<rss>feed</rss>\n'
+    assert os.path.exists(path)
+
+
+def test_enqueue_is_noop_when_github_not_configured(tmp_path, monkeypatch):
+    monkeypatch.setattr(github_sync, 'GIT_TOKEN', None)
+    outbox = sync_outbox.SyncOutbox(path=str(tmp_path / 'outbox.json'))
+
+    assert outbox.enqueue(['feed.xml']) is None
+    assert outbox.pending() is None
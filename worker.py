@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""定时任务进程：与Web进程分离运行抓取、综述、feed生成和GitHub同步
+
+Web进程设置 RUN_MODE=web 后只提供HTTP服务，可以水平扩展多个进程；
+本进程获得主节点锁后运行调度器，多个 worker 同时启动时只有一个运行任务，其余等待接替。
+
+用法:
+    python worker.py                     # 常驻运行定时任务
+    python worker.py --run-now           # 获得主节点锁后立即运行一次主流程并退出
+    python worker.py --run-now --wait 60 # 主节点锁被占用时最多等待60秒
+"""
+
+import argparse
+import sys
+import pytz
+from apscheduler.schedulers.blocking import BlockingScheduler
+import job_runner
+import jobs
+import sync_outbox
+
+
+def main():
+    parser = argparse.ArgumentParser(description="The Atlantic 每日综述定时任务进程")
+    parser.add_argument("--run-now", action="store_true", help="立即运行一次主流程并退出")
+    parser.add_argument("--wait", type=float, default=0,
+                        help="--run-now 时主节点锁被其他进程（如 RUN_MODE=all 的Web进程）持有的最长等待秒数，默认不等待")
+    args = parser.parse_args()
+
+    if args.run_now:
+        def run_once():
+            jobs.run_process_articles()
+            # 等待本次运行加入的同步任务完成第一次尝试，失败的任务留在队列中由下次运行继续
+            sync_outbox.get_outbox().flush()
+        if job_runner.run_as_leader(run_once, timeout=args.wait) is None:
+            print("主节点锁被占用，本次未运行。可等待当前主节点的定时任务执行，"
+                  "或将Web进程设为 RUN_MODE=web 后再运行", file=sys.stderr)
+            sys.exit(1)
+        return
+
+    scheduler = BlockingScheduler(timezone=pytz.timezone('Asia/Shanghai'))
+
+    def start():
+        jobs.start_background_sync()
+        jobs.register_jobs(scheduler)
+        print("定时任务进程已启动")
+        scheduler.start()
+
+    try:
+        job_runner.run_as_leader(start)
+    except (KeyboardInterrupt, SystemExit):
+        pass
+
+
+if __name__ == "__main__":
+    main()